@@ -2,6 +2,8 @@ from sqlalchemy import Column, Integer, String, Boolean, DateTime
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import bcrypt
+import time
+from config import load_auth_config
 from database import Base
 
 class User(Base):
@@ -13,49 +15,107 @@ class User(Base):
     is_admin = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.now)
 
+class AuthSetting(Base):
+    # Values worked out once per database, e.g. the calibrated bcrypt cost
+    __tablename__ = 'auth_settings'
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False, unique=True)
+    value = Column(String, nullable=False)
+
+def calibrate_bcrypt_rounds(target_ms=250, minimum=12, maximum=16):
+    # Highest cost whose hash still takes at most target_ms on this machine.
+    # Each extra round doubles the work, so one timed hash at the minimum cost
+    # is enough to extrapolate the others.
+    started = time.perf_counter()
+    bcrypt.hashpw(b'calibration', bcrypt.gensalt(minimum))
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    rounds = minimum
+    while rounds < maximum and elapsed_ms * 2 <= target_ms:
+        rounds += 1
+        elapsed_ms *= 2
+    return rounds
+
+def hash_rounds(password_hash):
+    # '$2b$12$...' -> 12
+    return int(password_hash.split('$')[2])
+
 class AuthManager:
-    def __init__(self, session):
-        self.session = session
+    def __init__(self, db, rounds=None):
+        self.db = db
+        if rounds is None:
+            config = load_auth_config()
+            rounds = config['bcrypt_rounds']
+            if rounds == 'auto':
+                rounds = self.calibrated_rounds(config['target_ms'])
+        self.rounds = rounds
+
+    def calibrated_rounds(self, target_ms):
+        # Calibrated on first use and then read back, so the cost cannot drift
+        # between launches (and rehash every login) on a borderline host
+        AuthSetting.__table__.create(self.db.engine, checkfirst=True)
+        with self.db.read_session() as session:
+            stored = session.query(AuthSetting.value).filter_by(name='bcrypt_rounds').scalar()
+        if stored is not None:
+            return int(stored)
+        rounds = calibrate_bcrypt_rounds(target_ms)
+        with self.db.session_scope() as session:
+            session.add(AuthSetting(name='bcrypt_rounds', value=str(rounds)))
+        return rounds
+
+    def hash_password(self, password):
+        return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(self.rounds)).decode('utf-8')
+
+    def needs_rehash(self, password_hash):
+        # Only ever upgrades: a lower configured cost must not weaken stored hashes
+        return hash_rounds(password_hash) < self.rounds
+
+    def has_users(self):
+        with self.db.read_session() as session:
+            return session.query(User.id).first() is not None
 
     def create_user(self, username, password, is_admin=False):
-        if self.session.query(User).filter_by(username=username).first():
-            raise ValueError("Username already exists")
-        
-        password_bytes = password.encode('utf-8')
-        salt = bcrypt.gensalt()
-        password_hash = bcrypt.hashpw(password_bytes, salt)
+        with self.db.read_session() as session:
+            if session.query(User.id).filter_by(username=username).first():
+                raise ValueError("Username already exists")
         
         user = User(
             username=username,
-            password_hash=password_hash.decode('utf-8'),
+            password_hash=self.hash_password(password),
             is_admin=is_admin
         )
         
-        self.session.add(user)
-        self.session.commit()
+        with self.db.session_scope() as session:
+            session.add(user)
         return user
 
     def authenticate(self, username, password):
-        user = self.session.query(User).filter_by(username=username).first()
+        # Blocks for one bcrypt verification (and one hash when the stored cost
+        # is outdated), so the GUI calls it from a worker thread
+        with self.db.read_session() as session:
+            user = session.query(User).filter_by(username=username).first()
         if not user:
             return None
         
         password_bytes = password.encode('utf-8')
         stored_hash = user.password_hash.encode('utf-8')
         
-        if bcrypt.checkpw(password_bytes, stored_hash):
-            return user
-        return None
+        if not bcrypt.checkpw(password_bytes, stored_hash):
+            return None
+
+        # Upgrade hashes made with a lower cost factor while the plain
+        # password is at hand
+        if self.needs_rehash(user.password_hash):
+            user.password_hash = self.hash_password(password)
+            with self.db.session_scope() as session:
+                session.get(User, user.id).password_hash = user.password_hash
+        return user
 
     def change_password(self, username, old_password, new_password):
         user = self.authenticate(username, old_password)
         if not user:
             return False
         
-        password_bytes = new_password.encode('utf-8')
-        salt = bcrypt.gensalt()
-        password_hash = bcrypt.hashpw(password_bytes, salt)
-        
-        user.password_hash = password_hash.decode('utf-8')
-        self.session.commit()
+        with self.db.session_scope() as session:
+            session.get(User, user.id).password_hash = self.hash_password(new_password)
         return True 
\ No newline at end of file
@@ -0,0 +1,90 @@
+import argparse
+import os
+import tempfile
+import threading
+import time
+from config import ENGINE_PROFILES, DEFAULTS
+from database import Database
+
+# Compares the SQLite engine profiles from config.ENGINE_PROFILES:
+# committed single-row inserts, a bulk insert, and reads by concurrent
+# threads while a writer keeps committing.
+#
+#   python -m benchmarks.engine_profiles --inserts 500 --readers 4
+
+def make_database(directory, profile):
+    config = dict(DEFAULTS)
+    config.update(path=os.path.join(directory, f'{profile}.db'), pragmas=ENGINE_PROFILES[profile])
+    return Database(config=config)
+
+def single_inserts(db, count):
+    started = time.perf_counter()
+    for i in range(count):
+        db.add_customer(f'Customer {i}', f'+1{600000000 + i}')
+    return count / (time.perf_counter() - started)
+
+def bulk_insert(db, count, chunk_size=5000):
+    chunks = ([{'name': f'Bulk {i}', 'phone': f'+1{700000000 + i}'}
+               for i in range(start, min(start + chunk_size, count))]
+              for start in range(0, count, chunk_size))
+    started = time.perf_counter()
+    db.bulk_add_customers(chunks)
+    return count / (time.perf_counter() - started)
+
+def concurrent_reads(db, readers, seconds):
+    stop = threading.Event()
+    reads = [0] * readers
+    writes = [0]
+    errors = []
+
+    def reader(index):
+        while not stop.is_set():
+            try:
+                db.get_statistics()
+                db.get_customers_with_needs(index * 100, 100)
+                db.search_customers('Customer 1')
+                reads[index] += 1
+            except Exception as e:
+                errors.append(e)
+
+    def writer():
+        i = 0
+        while not stop.is_set():
+            try:
+                db.add_customer(f'Writer {i}', f'+1{800000000 + i}')
+                writes[0] += 1
+            except Exception as e:
+                errors.append(e)
+            i += 1
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    threads.append(threading.Thread(target=writer))
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return sum(reads) / seconds, writes[0] / seconds, len(errors)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare SQLite engine profiles")
+    parser.add_argument('--inserts', type=int, default=500)
+    parser.add_argument('--bulk', type=int, default=100000)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=3)
+    parser.add_argument('--profiles', nargs='*', default=list(ENGINE_PROFILES))
+    args = parser.parse_args()
+
+    print(f"{'profile':<8} {'inserts/s':>10} {'bulk rows/s':>12} {'reads/s':>9} {'writes/s':>9} {'errors':>7}")
+    with tempfile.TemporaryDirectory() as directory:
+        for profile in args.profiles:
+            db = make_database(directory, profile)
+            inserts = single_inserts(db, args.inserts)
+            bulk = bulk_insert(db, args.bulk)
+            reads, writes, errors = concurrent_reads(db, args.readers, args.seconds)
+            db.engine.dispose()
+            print(f"{profile:<8} {inserts:>10.0f} {bulk:>12.0f} {reads:>9.0f} {writes:>9.0f} {errors:>7}")
+
+if __name__ == '__main__':
+    main()
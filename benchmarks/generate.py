@@ -0,0 +1,101 @@
+import argparse
+import itertools
+import os
+import random
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import insert
+from config import ENGINE_PROFILES, DEFAULTS
+from database import Database, Customer, Product, Need
+
+# Builds a fully migrated database filled with seeded synthetic data. The same
+# scale and seed always produce the same rows (timestamps are relative to the
+# generation time), so benchmark runs against regenerated databases stay comparable.
+#
+#   python -m benchmarks.generate --scale medium --output /tmp/needs-medium.db
+
+# customers, products, needs per customer (on average)
+SCALES = {
+    'small': (1000, 50, 3),
+    'medium': (100000, 500, 3),
+    'large': (1000000, 2000, 3),
+}
+
+FIRST_NAMES = ['Amina', 'Youssef', 'Fatima', 'Omar', 'Salma', 'Karim', 'Nadia', 'Hassan', 'Laila', 'Mehdi',
+               'Sara', 'Adam', 'Imane', 'Rachid', 'Khadija', 'Anas', 'Meryem', 'Hamza', 'Zineb', 'Ayoub']
+LAST_NAMES = ['Alaoui', 'Benali', 'Chraibi', 'Idrissi', 'El Amrani', 'Fassi', 'Tazi', 'Berrada', 'Bennani',
+              'Squalli', 'Lahlou', 'Kettani', 'Sebti', 'Ouazzani', 'Naciri', 'Hajji', 'Zerouali', 'Mansouri']
+
+def customer_rows(rng, count, start, end, chunk_size):
+    span = int((end - start).total_seconds())
+    for first in range(1, count + 1, chunk_size):
+        yield [{'id': i,
+                'name': f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {i}',
+                'phone': f'+2126{i:08d}',
+                'created_at': start + timedelta(seconds=rng.randrange(span))}
+               for i in range(first, min(first + chunk_size, count + 1))]
+
+def need_rows(rng, customers, products, per_customer, start, end, chunk_size):
+    # Product popularity follows Zipf's law (the k-th product is needed 1/k as
+    # often as the first). Old needs are mostly fulfilled, recent ones mostly pending.
+    span = int((end - start).total_seconds())
+    recent = end - timedelta(days=30)
+    product_ids = range(1, products + 1)
+    cum_weights = list(itertools.accumulate(1 / k for k in product_ids))
+    chunk = []
+    need_id = 0
+    for _ in range(customers * per_customer):
+        need_id += 1
+        created_at = start + timedelta(seconds=rng.randrange(span))
+        is_fulfilled = rng.random() < (0.95 if created_at < recent else 0.4)
+        chunk.append({'id': need_id,
+                      'customer_id': rng.randint(1, customers),
+                      'product_id': rng.choices(product_ids, cum_weights=cum_weights)[0],
+                      'is_fulfilled': is_fulfilled,
+                      'created_at': created_at,
+                      'fulfilled_at': (created_at + timedelta(hours=rng.randint(1, 240))
+                                       if is_fulfilled else None)})
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def generate(path, scale='small', seed_value=42, years=3, chunk_size=50000, now=None):
+    customers, products, per_customer = SCALES[scale]
+    if os.path.exists(path):
+        raise FileExistsError(path)
+
+    config = dict(DEFAULTS)
+    config.update(path=path, profile='bulk', pragmas=ENGINE_PROFILES['bulk'])
+    db = Database(config=config)
+
+    rng = random.Random(seed_value)
+    end = (now or datetime.now()).replace(microsecond=0)
+    start = end - timedelta(days=365 * years)
+    with db.engine.begin() as conn:
+        conn.execute(insert(Product), [{'id': i, 'name': f'Product {i}', 'created_at': start}
+                                       for i in range(1, products + 1)])
+        for chunk in customer_rows(rng, customers, start, end, chunk_size):
+            conn.execute(insert(Customer), chunk)
+        for chunk in need_rows(rng, customers, products, per_customer, start, end, chunk_size):
+            conn.execute(insert(Need), chunk)
+    return db
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic needs database")
+    parser.add_argument('--scale', choices=list(SCALES), default='small')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--years', type=int, default=3)
+    parser.add_argument('--output', required=True)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    db = generate(args.output, args.scale, args.seed, args.years)
+    stats = db.get_statistics()
+    db.engine.dispose()
+    print(f"{args.output}: {stats['total_customers']} customers, {stats['total_products']} products, "
+          f"{stats['total_needs']} needs in {time.perf_counter() - started:.1f}s")
+
+if __name__ == '__main__':
+    main()
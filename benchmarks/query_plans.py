@@ -0,0 +1,95 @@
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, text
+from database import Base
+from migrations import run_migrations
+
+# Seeds a database with the pre-migration schema, then prints the query plan
+# and timing of the hot queries before and after run_migrations.
+#
+#   python -m benchmarks.query_plans --customers 50000 --needs 200000
+
+QUERIES = {
+    'get_customers_needing_product': (
+        "SELECT customers.* FROM customers JOIN needs ON customers.id = needs.customer_id "
+        "JOIN products ON products.id = needs.product_id "
+        "WHERE products.name = :product_name AND needs.is_fulfilled = 0"),
+    'mark_need_fulfilled': (
+        "SELECT * FROM needs WHERE customer_id = :customer_id AND product_id = :product_id "
+        "AND is_fulfilled = 0 LIMIT 1"),
+    'get_customer_needs': "SELECT * FROM needs WHERE customer_id = :customer_id",
+    'calendar_day': "SELECT * FROM needs WHERE created_at >= :start AND created_at < :end",
+    'recent_activity': "SELECT * FROM needs ORDER BY created_at DESC LIMIT 10",
+}
+
+def create_legacy_schema(engine):
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                conn.execute(text(f"DROP INDEX IF EXISTS {index.name}"))
+        conn.execute(text("PRAGMA user_version = 0"))
+
+def seed(engine, customers, products, needs, seed_value=42):
+    rng = random.Random(seed_value)
+    start = datetime.now() - timedelta(days=3 * 365)
+    fmt = '%Y-%m-%d %H:%M:%S.%f'
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO customers (id, name, phone, created_at) VALUES (:id, :name, :phone, :created_at)"),
+                     [{'id': i, 'name': f'Customer {i}', 'phone': f'+1{600000000 + i}',
+                       'created_at': start.strftime(fmt)} for i in range(1, customers + 1)])
+        conn.execute(text("INSERT INTO products (id, name, created_at) VALUES (:id, :name, :created_at)"),
+                     [{'id': i, 'name': f'Product {i}', 'created_at': start.strftime(fmt)}
+                      for i in range(1, products + 1)])
+        rows = []
+        for i in range(1, needs + 1):
+            created_at = start + timedelta(seconds=rng.randrange(3 * 365 * 86400))
+            rows.append({'id': i, 'customer_id': rng.randint(1, customers),
+                         'product_id': min(int(rng.paretovariate(1.2)), products),
+                         'is_fulfilled': rng.random() < 0.7, 'created_at': created_at.strftime(fmt)})
+        conn.execute(text("INSERT INTO needs (id, customer_id, product_id, is_fulfilled, created_at) "
+                          "VALUES (:id, :customer_id, :product_id, :is_fulfilled, :created_at)"), rows)
+
+def query_params():
+    day = (datetime.now() - timedelta(days=100)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return {'product_name': 'Product 1', 'customer_id': 7, 'product_id': 1,
+            'start': str(day), 'end': str(day + timedelta(days=1))}
+
+def report(engine, label, repeat):
+    params = query_params()
+    print(f"== {label}")
+    with engine.connect() as conn:
+        for name, sql in QUERIES.items():
+            plan = conn.execute(text("EXPLAIN QUERY PLAN " + sql), params).fetchall()
+            started = time.perf_counter()
+            for _ in range(repeat):
+                conn.execute(text(sql), params).fetchall()
+            elapsed = (time.perf_counter() - started) / repeat * 1000
+            print(f"{name}: {elapsed:.2f} ms")
+            for row in plan:
+                print(f"    {row[-1]}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare query plans before and after migrations")
+    parser.add_argument('--customers', type=int, default=20000)
+    parser.add_argument('--products', type=int, default=500)
+    parser.add_argument('--needs', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+        create_legacy_schema(engine)
+        seed(engine, args.customers, args.products, args.needs)
+        report(engine, "before migrations", args.repeat)
+        for version, description in run_migrations(engine):
+            print(f"applied migration {version}: {description}")
+        report(engine, "after migrations", args.repeat)
+        engine.dispose()
+
+if __name__ == '__main__':
+    main()
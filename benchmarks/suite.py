@@ -0,0 +1,272 @@
+import argparse
+import inspect
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+from config import ENGINE_PROFILES, DEFAULTS
+from database import Database
+from data_manager import DataManager
+from benchmarks.generate import SCALES, generate
+
+# Times every public Database method, the DataManager exports and imports and
+# the chart and calendar refreshes (headless Qt) against a generated database,
+# and writes the timings as JSON. Pass an earlier result file to --compare to
+# list regressions.
+#
+#   python -m benchmarks.suite --scale medium --output medium.json
+#   python -m benchmarks.suite --db /tmp/needs-medium.db --output after.json --compare medium.json
+
+def timed(fn, repeat, setup=None):
+    # Milliseconds per run; setup() runs before each run and is not timed
+    runs = []
+    for _ in range(repeat):
+        argument = setup() if setup else None
+        started = time.perf_counter()
+        fn(argument)
+        runs.append((time.perf_counter() - started) * 1000)
+    return {'runs': repeat, 'min_ms': min(runs), 'median_ms': statistics.median(runs), 'max_ms': max(runs)}
+
+def database_cases(db):
+    # {name: (fn, setup, repeat)}; repeat None uses the suite default. Writes
+    # use fresh keys on every run, so the database can be benchmarked repeatedly.
+    now = datetime.now()
+    serial = iter(range(10 ** 9))
+    products = db.get_products_page(0, 1)
+    customers = db.get_customers_with_needs(0, 1)
+    product_id = products[0].id
+    customer_id = customers[0][0].id
+    phones = [f'+2126{i:08d}' for i in range(1, 1001)]
+    names = [f'Product {i}' for i in range(1, 1001)]
+
+    def new_phone():
+        return f'+2125{next(serial):08d}'
+
+    def new_customer(_=None):
+        return db.add_customer('Benchmark Customer', new_phone()).id
+
+    def new_product(_=None):
+        return db.add_product(f'Benchmark Product {next(serial)}').id
+
+    def pending_need(_=None):
+        db.add_need(customer_id, product_id)
+
+    def warm_products(_=None):
+        # Bulk product inserts leave the name cache to be reloaded on next use
+        db.resolve_product('Product 1')
+
+    def need_entries(_=None):
+        return [('Benchmark Customer', new_phone(), f'Product {i % 20 + 1}') for i in range(50)]
+
+    def bulk_customers(_=None):
+        return [[{'name': 'Bulk Customer', 'phone': new_phone()} for _ in range(1000)]]
+
+    def bulk_products(_=None):
+        return [[{'name': f'Bulk Product {next(serial)}'} for _ in range(1000)]]
+
+    return {
+        'validate_phone': (lambda _: db.validate_phone('+212612345678'), None, None),
+        'add_customer': (lambda _: new_customer(), None, None),
+        'add_product': (lambda _: new_product(), None, None),
+        'add_need': (lambda _: db.add_need(customer_id, product_id), None, None),
+        'add_customer_need': (lambda _: db.add_customer_need('Benchmark Customer', new_phone(), 'Product 1'), None, None),
+        'add_customer_needs (50)': (db.add_customer_needs, need_entries, None),
+        'bulk_add_customers': (db.bulk_add_customers, bulk_customers, None),
+        'bulk_add_products': (db.bulk_add_products, bulk_products, None),
+        'get_existing_phones': (lambda _: db.get_existing_phones(phones), None, None),
+        'get_existing_product_names': (lambda _: db.get_existing_product_names(names), None, None),
+        'get_customers_needing_product': (lambda _: db.get_customers_needing_product('Product 1'), None, None),
+        'mark_need_fulfilled': (lambda _: db.mark_need_fulfilled(customer_id, product_id), pending_need, None),
+        'get_product_by_name': (lambda _: db.get_product_by_name('Product 1'), None, None),
+        'resolve_product': (lambda _: db.resolve_product('Product 1'), warm_products, None),
+        'get_or_create_product (existing)': (lambda _: db.get_or_create_product('Product 1'), warm_products, None),
+        'get_or_create_product (new)': (
+            lambda _: db.get_or_create_product(f'Benchmark Product {next(serial)}'), None, None),
+        'get_all_products': (lambda _: db.get_all_products(), None, None),
+        'get_all_customers': (lambda _: db.get_all_customers(), None, 1),
+        'get_products_page': (lambda _: db.get_products_page(0, 200), None, None),
+        'get_customers_with_needs': (lambda _: db.get_customers_with_needs(0, 200), None, None),
+        'get_products_by_ids': (lambda _: db.get_products_by_ids(range(1, 201)), None, None),
+        'get_customers_by_ids': (lambda _: db.get_customers_by_ids(range(1, 201)), None, None),
+        'get_needs_for_customers': (lambda _: db.get_needs_for_customers(range(1, 1001)), None, None),
+        'get_recent_activity': (lambda _: db.get_recent_activity(), None, None),
+        'get_needs_between': (lambda _: db.get_needs_between(now - timedelta(days=1), now), None, None),
+        'iter_need_rows': (lambda _: sum(1 for _ in db.iter_need_rows(5000)), None, 1),
+        'iter_product_need_counts': (lambda _: sum(1 for _ in db.iter_product_need_counts(5000)), None, 1),
+        'get_top_products': (lambda _: db.get_top_products(10), None, None),
+        'get_need_counts_by_day': (lambda _: db.get_need_counts_by_day(), None, None),
+        'get_sla_thresholds': (lambda _: db.get_sla_thresholds(), None, None),
+        'set_product_sla': (lambda _: db.set_product_sla(product_id, None), None, None),
+        'count_stale_needs': (lambda _: db.count_stale_needs(now - timedelta(hours=24)), None, None),
+        'get_customer_needs': (lambda _: db.get_customer_needs(customer_id), None, None),
+        'search_customers': (lambda _: db.search_customers('Amina Tazi'), None, None),
+        'search_customers (short)': (lambda _: db.search_customers('Am'), None, None),
+        'search_customer_rows': (lambda _: db.search_customer_rows('Amina Tazi'), None, None),
+        'delete_customer': (db.delete_customer, new_customer, None),
+        'delete_product': (db.delete_product, new_product, None),
+        'get_statistics': (lambda _: db.get_statistics(), None, None),
+        'get_data_version': (lambda _: db.get_data_version(), None, None),
+        'check_statistics': (lambda _: db.check_statistics(), None, 1),
+    }
+
+def data_manager_cases(db, directory):
+    manager = DataManager(db)
+    serial = iter(range(10 ** 9))
+    export_file = os.path.join(directory, 'export.csv')
+
+    def customers_file(_=None):
+        # 10k new customers, 1% of them with an invalid phone
+        filename = os.path.join(directory, f'customers_{next(serial)}.csv')
+        offset = next(serial) * 10000
+        with open(filename, 'w') as f:
+            f.write('Name,Phone\n')
+            for i in range(10000):
+                phone = 'invalid' if i % 100 == 0 else f'+2127{offset + i:08d}'
+                f.write(f'Imported Customer {i},{phone}\n')
+        return filename
+
+    def products_file(_=None):
+        filename = os.path.join(directory, f'products_{next(serial)}.csv')
+        offset = next(serial) * 1000
+        with open(filename, 'w') as f:
+            f.write('Product Name\n')
+            for i in range(1000):
+                f.write(f'Imported Product {offset + i}\n')
+        return filename
+
+    return {
+        'export_customers_to_csv': (lambda _: manager.export_customers_to_csv(export_file), None, 1),
+        'export_products_to_csv': (lambda _: manager.export_products_to_csv(export_file), None, 1),
+        'export_needs_to_csv': (lambda _: manager.export_needs_to_csv(export_file), None, 1),
+        'export_data (needs, xlsx)': (lambda _: manager.export_data('needs', export_file, file_format='xlsx'), None, 1),
+        'export_data (needs, parquet)': (
+            lambda _: manager.export_data('needs', export_file, file_format='parquet'), None, 1),
+        'export_data (needs, feather)': (
+            lambda _: manager.export_data('needs', export_file, file_format='feather'), None, 1),
+        'import_customers_from_csv': (manager.import_customers_from_csv, customers_file, None),
+        'import_products_from_csv': (manager.import_products_from_csv, products_file, None),
+    }
+
+def view_cases(db):
+    # Full refreshes: the cached data version is cleared before every run
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt6.QtWidgets import QApplication
+    from charts import ChartsView
+    from calendar_view import CalendarView
+
+    app = QApplication.instance() or QApplication([])
+    charts = ChartsView(db)
+    calendar = CalendarView(db)
+
+    def reset_charts(_=None):
+        charts.rendered_version = None
+
+    def reset_calendar(_=None):
+        calendar.cache_version = None
+        calendar.month_cache = {}
+
+    def update_charts(_):
+        charts.update_charts()
+        charts.canvas.draw()
+
+    return {
+        'ChartsView.update_charts': (update_charts, reset_charts, None),
+        'ChartsView.update_charts (unchanged)': (lambda _: charts.update_charts(), None, None),
+        'CalendarView.update_calendar_highlights': (lambda _: calendar.update_calendar_highlights(),
+                                                    reset_calendar, None),
+        'CalendarView.update_calendar_highlights (cached)': (
+            lambda _: calendar.update_calendar_highlights(), None, None),
+    }, (app, charts, calendar)
+
+def unbenchmarked_methods(cases):
+    methods = {name for name, _ in inspect.getmembers(Database, inspect.isfunction)
+               if not name.startswith('_')} - {'session_scope', 'read_session'}
+    return sorted(methods - {name.split(' ')[0] for name in cases})
+
+def run(db_path, repeat, directory):
+    config = dict(DEFAULTS)
+    config.update(path=db_path, pragmas=ENGINE_PROFILES[DEFAULTS['profile']])
+    db = Database(config=config)
+    stats = db.get_statistics()
+
+    cases = database_cases(db)
+    cases.update(data_manager_cases(db, directory))
+    view, widgets = view_cases(db)
+    cases.update(view)
+
+    results = {}
+    for name, (fn, setup, case_repeat) in cases.items():
+        results[name] = timed(fn, case_repeat or repeat, setup)
+        print(f"{name:<50} {results[name]['median_ms']:>10.2f} ms")
+    for name in unbenchmarked_methods(cases):
+        print(f"not benchmarked: Database.{name}")
+    db.engine.dispose()
+
+    return {
+        'meta': {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            'profile': DEFAULTS['profile'],
+            'repeat': repeat,
+            'counts': stats,
+        },
+        'results': results,
+    }
+
+def compare(current, baseline, threshold, min_delta_ms):
+    # Prints median changes against an earlier result file; returns the
+    # regressions, ignoring sub-millisecond jitter
+    print(f"\n{'benchmark':<50} {'before':>10} {'after':>10} {'change':>8}")
+    regressions = []
+    for name, result in current['results'].items():
+        before = baseline['results'].get(name)
+        if before is None:
+            continue
+        change = (result['median_ms'] - before['median_ms']) / before['median_ms'] if before['median_ms'] else 0
+        flag = ''
+        if change > threshold and result['median_ms'] - before['median_ms'] > min_delta_ms:
+            flag = ' REGRESSION'
+            regressions.append(name)
+        print(f"{name:<50} {before['median_ms']:>10.2f} {result['median_ms']:>10.2f} {change:>+8.0%}{flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Database, DataManager and view hot paths")
+    parser.add_argument('--scale', choices=list(SCALES), default='small')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--db', help="generated database to copy instead of generating one")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', help="write the results to this JSON file")
+    parser.add_argument('--compare', help="earlier JSON results to diff against")
+    parser.add_argument('--threshold', type=float, default=0.2, help="slowdown reported as a regression")
+    parser.add_argument('--min-delta-ms', type=float, default=1.0, help="ignore smaller absolute slowdowns")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        # Always benchmark a copy: the write benchmarks add rows
+        db_path = os.path.join(directory, 'bench.db')
+        if args.db:
+            shutil.copyfile(args.db, db_path)
+        else:
+            generate(db_path, args.scale, args.seed).engine.dispose()
+        results = run(db_path, args.repeat, directory)
+    results['meta'].update(scale=None if args.db else args.scale, seed=args.seed, db=args.db)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold, args.min_delta_ms)
+        if regressions:
+            raise SystemExit(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+
+if __name__ == '__main__':
+    main()
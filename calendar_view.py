@@ -1,15 +1,25 @@
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QCalendarWidget, 
                             QTableWidget, QTableWidgetItem, QLabel)
-from PyQt6.QtCore import Qt, QDate, QTimer
-from database import Database, Need
+from PyQt6.QtCore import QDate
+from PyQt6.QtGui import QColor, QTextCharFormat
+from database import Database
+from query_stats import tracked
 from datetime import datetime, timedelta
 
 class CalendarView(QWidget):
+    # Background colour by number of pending needs on a day; days whose needs
+    # are all fulfilled get the first colour
+    HIGHLIGHT_COLORS = [(0, QColor('#c8e6c9')), (1, QColor('#fff59d')),
+                        (3, QColor('#ffcc80')), (10, QColor('#ef9a9a'))]
+
     def __init__(self, db):
         super().__init__()
         self.db = db
+        # {(year, month): {date: (total, pending)}}, valid for cache_version
+        self.month_cache = {}
+        self.cache_version = None
+        self.selected_date = None
         self.setup_ui()
-        self.setup_notifications()
 
     def setup_ui(self):
         layout = QVBoxLayout(self)
@@ -17,6 +27,7 @@ class CalendarView(QWidget):
         # Calendar Widget
         self.calendar = QCalendarWidget()
         self.calendar.clicked.connect(self.date_selected)
+        self.calendar.currentPageChanged.connect(lambda year, month: self.update_calendar_highlights())
         layout.addWidget(self.calendar)
         
         # Date Label
@@ -32,13 +43,9 @@ class CalendarView(QWidget):
         # Update calendar highlights
         self.update_calendar_highlights()
 
-    def setup_notifications(self):
-        # Check for pending needs every 5 minutes
-        self.notification_timer = QTimer()
-        self.notification_timer.timeout.connect(self.check_pending_needs)
-        self.notification_timer.start(300000)  # 5 minutes
-
+    @tracked
     def date_selected(self, date):
+        self.selected_date = date
         self.date_label.setText(f"Needs for {date.toString('yyyy-MM-dd')}")
         self.update_needs_table(date)
 
@@ -46,45 +53,95 @@ class CalendarView(QWidget):
         start_date = datetime(date.year(), date.month(), date.day())
         end_date = start_date + timedelta(days=1)
         
-        needs = self.db.session.query(Need).filter(
-            Need.created_at >= start_date,
-            Need.created_at < end_date
-        ).all()
+        needs = self.db.get_needs_between(start_date, end_date)
         
         self.needs_table.setRowCount(len(needs))
-        for i, need in enumerate(needs):
-            self.needs_table.setItem(i, 0, QTableWidgetItem(need.customer.name))
-            self.needs_table.setItem(i, 1, QTableWidgetItem(need.product.name))
-            status = "Fulfilled" if need.is_fulfilled else "Pending"
+        for i, (customer_name, product_name, is_fulfilled, created_at) in enumerate(needs):
+            self.needs_table.setItem(i, 0, QTableWidgetItem(customer_name))
+            self.needs_table.setItem(i, 1, QTableWidgetItem(product_name))
+            status = "Fulfilled" if is_fulfilled else "Pending"
             self.needs_table.setItem(i, 2, QTableWidgetItem(status))
-            time = need.created_at.strftime("%H:%M")
+            time = created_at.strftime("%H:%M")
             self.needs_table.setItem(i, 3, QTableWidgetItem(time))
 
+    @tracked
     def update_calendar_highlights(self):
-        # Get all needs dates
-        needs = self.db.session.query(Need).all()
-        dates_with_needs = set(need.created_at.date() for need in needs)
+        year, month = self.visible_month()
+        version = self.db.get_data_version()
+        if version == self.cache_version and (year, month) in self.month_cache:
+            counts = self.month_cache[(year, month)]
+        else:
+            counts = self.load_highlight_counts(self.db, year, month)
+        self.apply_highlights(year, month, counts, version)
+
+    def visible_month(self):
+        return self.calendar.yearShown(), self.calendar.monthShown()
+
+    @staticmethod
+    def load_highlight_counts(db, year, month):
+        # Safe to call from a worker thread
+        start, end = CalendarView.highlight_range(year, month)
+        return {datetime.strptime(day, '%Y-%m-%d').date(): (total, pending)
+                for day, total, pending in db.get_need_counts_by_day(start, end)}
+
+    def apply_changes(self, changes):
+        # Patches the cached day counts for a change_events.ChangeSet and
+        # repaints the visible month if one of its days changed
+        if 'needs' in changes.reset:
+            self.cache_version = None
+            self.update_calendar_highlights()
+            return
+        day_deltas = changes.day_deltas()
+        if not day_deltas:
+            return
+
+        version = self.db.get_data_version()
+        for (year, month), counts in self.month_cache.items():
+            start, end = self.highlight_range(year, month)
+            for day, (total, pending) in day_deltas.items():
+                if start.date() <= day < end.date():
+                    day_total, day_pending = counts.get(day, (0, 0))
+                    counts[day] = (day_total + total, day_pending + pending)
+                    if not counts[day][0]:
+                        del counts[day]
+        self.cache_version = version
+
+        year, month = self.visible_month()
+        if (year, month) in self.month_cache:
+            self.apply_highlights(year, month, self.month_cache[(year, month)], version)
+        else:
+            self.update_calendar_highlights()
+
+        if self.selected_date and self.selected_date.toPyDate() in day_deltas:
+            self.update_needs_table(self.selected_date)
+
+    @staticmethod
+    def highlight_range(year, month):
+        # The month plus the adjacent days the calendar grid also shows
+        first_day = datetime(year, month, 1)
+        start = first_day - timedelta(days=7)
+        end = (first_day + timedelta(days=32)).replace(day=1) + timedelta(days=14)
+        return start, end
+
+    def apply_highlights(self, year, month, counts, version):
+        if version != self.cache_version:
+            self.month_cache = {}
+            self.cache_version = version
+        self.month_cache[(year, month)] = counts
+        if (year, month) != self.visible_month():
+            return
         
         # Format dates for calendar
-        self.calendar.setDateTextFormat(QDate(), self.calendar.dateTextFormat(QDate()))
-        for date in dates_with_needs:
+        self.calendar.setDateTextFormat(QDate(), QTextCharFormat())
+        for date, (total, pending) in counts.items():
             qdate = QDate(date.year, date.month, date.day)
             format = self.calendar.dateTextFormat(qdate)
-            format.setBackground(Qt.GlobalColor.yellow)
+            format.setBackground(self.highlight_color(pending))
             self.calendar.setDateTextFormat(qdate, format)
 
-    def check_pending_needs(self):
-        # Get needs that are more than 24 hours old and still pending
-        old_date = datetime.now() - timedelta(days=1)
-        pending_needs = self.db.session.query(Need).filter(
-            Need.created_at <= old_date,
-            Need.is_fulfilled == False
-        ).all()
-        
-        if pending_needs:
-            # Here you would implement your notification system
-            # For example, you could show a QMessageBox or use a system notification
-            print(f"Warning: {len(pending_needs)} needs are pending for more than 24 hours")
-            
-            # You could also update the calendar highlights
-            self.update_calendar_highlights() 
\ No newline at end of file
+    def highlight_color(self, pending):
+        color = self.HIGHLIGHT_COLORS[0][1]
+        for threshold, threshold_color in self.HIGHLIGHT_COLORS:
+            if pending >= threshold:
+                color = threshold_color
+        return color
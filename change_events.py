@@ -0,0 +1,129 @@
+import threading
+from collections import defaultdict, namedtuple
+from sqlalchemy import event, inspect
+
+# One need that changed in a committed transaction. before/after are the
+# is_fulfilled values, None when the need did not exist on that side.
+NeedChange = namedtuple('NeedChange', 'id customer_id product_id created_at before after')
+
+class ChangeSet:
+    # What one committed transaction changed: the ids inserted, updated and
+    # deleted per table, the needs involved, and the tables written by bulk
+    # statements (reset) whose individual rows are not known
+    def __init__(self):
+        self.inserted = defaultdict(set)
+        self.updated = defaultdict(set)
+        self.deleted = defaultdict(set)
+        self.needs = []
+        self.reset = set()
+
+    def __bool__(self):
+        return bool(self.reset or self.needs or any(self.inserted.values())
+                    or any(self.updated.values()) or any(self.deleted.values()))
+
+    def touches(self, table):
+        return bool(table in self.reset or self.inserted[table] or self.updated[table] or self.deleted[table])
+
+    def statistic_deltas(self):
+        # Differences in Database.get_statistics(), or None after bulk changes
+        if self.reset:
+            return None
+        deltas = {
+            'total_customers': len(self.inserted['customers']) - len(self.deleted['customers']),
+            'total_products': len(self.inserted['products']) - len(self.deleted['products']),
+            'total_needs': 0,
+            'fulfilled_needs': 0,
+            'pending_needs': 0,
+        }
+        for total, pending in self._need_deltas():
+            deltas['total_needs'] += total
+            deltas['fulfilled_needs'] += total - pending
+            deltas['pending_needs'] += pending
+        return deltas
+
+    def day_deltas(self):
+        # {date: (total delta, pending delta)} by creation day of the changed needs
+        days = {}
+        for need, (total, pending) in zip(self.needs, self._need_deltas()):
+            if total or pending:
+                day = need.created_at.date()
+                day_total, day_pending = days.get(day, (0, 0))
+                days[day] = (day_total + total, day_pending + pending)
+        return days
+
+    def _need_deltas(self):
+        for need in self.needs:
+            total = (need.after is not None) - (need.before is not None)
+            pending = (need.after is False) - (need.before is False)
+            yield total, pending
+
+class ChangeBus:
+    # Collects ORM changes per session in after_flush and publishes them as a
+    # ChangeSet to every subscriber after the commit; rolled back changes are
+    # dropped. Subscribers are called on the committing thread.
+    def __init__(self):
+        self.subscribers = []
+        self.lock = threading.Lock()
+
+    def subscribe(self, callback):
+        with self.lock:
+            self.subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        with self.lock:
+            self.subscribers.remove(callback)
+
+    def publish(self, changes):
+        with self.lock:
+            subscribers = list(self.subscribers)
+        for callback in subscribers:
+            callback(changes)
+
+    def watch(self, session_factory):
+        event.listen(session_factory, 'after_flush', self.after_flush)
+        event.listen(session_factory, 'after_commit', self.after_commit)
+        event.listen(session_factory, 'after_rollback', self.after_rollback)
+
+    @staticmethod
+    def pending_changes(session):
+        return session.info.setdefault('changes', ChangeSet())
+
+    @classmethod
+    def mark_bulk(cls, session, table):
+        # For Core statements, which do not go through the ORM flush
+        cls.pending_changes(session).reset.add(table)
+
+    @classmethod
+    def mark_inserted(cls, session, table, row_id):
+        cls.pending_changes(session).inserted[table].add(row_id)
+
+    def after_flush(self, session, flush_context):
+        changes = self.pending_changes(session)
+        for obj in session.new:
+            changes.inserted[obj.__tablename__].add(obj.id)
+            if obj.__tablename__ == 'needs':
+                changes.needs.append(self.need_change(obj, None, bool(obj.is_fulfilled)))
+        for obj in session.dirty:
+            if not session.is_modified(obj, include_collections=False):
+                continue
+            changes.updated[obj.__tablename__].add(obj.id)
+            if obj.__tablename__ == 'needs':
+                history = inspect(obj).attrs.is_fulfilled.history
+                before = history.deleted[0] if history.deleted else obj.is_fulfilled
+                changes.needs.append(self.need_change(obj, bool(before), bool(obj.is_fulfilled)))
+        for obj in session.deleted:
+            changes.deleted[obj.__tablename__].add(obj.id)
+            if obj.__tablename__ == 'needs':
+                changes.needs.append(self.need_change(obj, bool(obj.is_fulfilled), None))
+
+    @staticmethod
+    def need_change(need, before, after):
+        return NeedChange(need.id, need.customer_id, need.product_id, need.created_at, before, after)
+
+    def after_commit(self, session):
+        changes = session.info.pop('changes', None)
+        if changes:
+            self.publish(changes)
+
+    def after_rollback(self, session):
+        session.info.pop('changes', None)
@@ -1,94 +1,172 @@
 from PyQt6.QtWidgets import QWidget, QVBoxLayout
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
-import matplotlib.pyplot as plt
-import pandas as pd
-from database import Database, Need, Customer, Product
+import math
+from database import Database, Customer, Product
 from datetime import datetime, timedelta
 
 class ChartsView(QWidget):
-    def __init__(self, db):
+    def __init__(self, db, top_n=10):
         super().__init__()
         self.db = db
+        self.top_n = top_n
+        # Data version of what is currently drawn; None forces the next render
+        self.rendered_version = None
+        self.data = None
         self.setup_ui()
 
     def setup_ui(self):
         layout = QVBoxLayout(self)
-        
+
         # Create figure and canvas
         self.figure = Figure(figsize=(8, 6))
         self.canvas = FigureCanvas(self.figure)
         layout.addWidget(self.canvas)
-        
-        # Create subplots
-        self.ax1 = self.figure.add_subplot(221)  # Top left
-        self.ax2 = self.figure.add_subplot(222)  # Top right
-        self.ax3 = self.figure.add_subplot(212)  # Bottom
-        
+
+        # Create subplots once; renders only update their artists
+        self.ax1 = self.figure.add_subplot(221)  # Status pie chart
+        self.ax2 = self.figure.add_subplot(222)  # Top products bar chart
+        self.ax3 = self.figure.add_subplot(212)  # Needs over time line chart
+
+        self.wedges, self.pie_labels, self.pie_percentages = self.ax1.pie(
+            [1, 1], labels=['Fulfilled', 'Pending'], autopct='%1.1f%%')
+        self.ax1.set_title('Needs Status')
+
+        self.bars = None
+        self.bar_labels = None
+        self.ax2.set_title('Top Products')
+
+        self.ax3.xaxis_date()
+        self.line, = self.ax3.plot([], [], marker='o')
+        self.ax3.set_title('Needs Over Time')
+        self.ax3.tick_params(axis='x', rotation=45)
+
+        self.empty_text = self.figure.text(0.5, 0.5, 'No data available',
+                                           horizontalalignment='center',
+                                           verticalalignment='center')
+
         # Update charts
         self.update_charts()
 
     def update_charts(self):
-        # Clear the figure
-        self.figure.clear()
-        
-        # Get data from database
-        needs = self.db.session.query(Need).all()
-        
-        if not needs:
-            # If no data, show a message
-            ax = self.figure.add_subplot(111)
-            ax.text(0.5, 0.5, 'No data available', 
-                   horizontalalignment='center',
-                   verticalalignment='center',
-                   transform=ax.transAxes)
-            self.canvas.draw()
+        # Skip the queries entirely when nothing changed since the last render
+        if self.rendered_version is not None and self.db.get_data_version() == self.rendered_version:
+            return
+        self.render_charts(self.load_chart_data(self.db, self.top_n))
+
+    @staticmethod
+    def load_chart_data(db, top_n=10):
+        # Safe to call from a worker thread; returns plain values for render_charts
+        version = db.get_data_version()
+        stats = db.get_statistics()
+        if not stats['total_needs']:
+            return {'version': version, 'empty': True}
+
+        top_products, other = db.get_top_products(top_n)
+        if other:
+            top_products.append(('Other', other))
+
+        return {
+            'version': version,
+            'empty': False,
+            'fulfilled': stats['fulfilled_needs'],
+            'pending': stats['pending_needs'],
+            'product_counts': top_products,
+            'date_counts': [(datetime.strptime(day, '%Y-%m-%d'), total)
+                            for day, total, _ in db.get_need_counts_by_day()]
+        }
+
+    def render_charts(self, data):
+        if data['version'] is not None and data['version'] == self.rendered_version:
             return
-            
-        # Create subplots
-        ax1 = self.figure.add_subplot(221)  # Status pie chart
-        ax2 = self.figure.add_subplot(222)  # Top products bar chart
-        ax3 = self.figure.add_subplot(212)  # Needs over time line chart
-        
-        # 1. Status pie chart
-        fulfilled = sum(1 for need in needs if need.is_fulfilled)
-        pending = len(needs) - fulfilled
-        ax1.pie([fulfilled, pending], labels=['Fulfilled', 'Pending'], autopct='%1.1f%%')
-        ax1.set_title('Needs Status')
-        
-        # 2. Top products bar chart
-        product_counts = {}
-        for need in needs:
-            product_name = need.product.name
-            product_counts[product_name] = product_counts.get(product_name, 0) + 1
-        
-        products = list(product_counts.keys())
-        counts = list(product_counts.values())
-        
-        if products and counts:
-            ax2.bar(products, counts)
-            ax2.set_title('Top Products')
-            ax2.tick_params(axis='x', rotation=45)
-        
-        # 3. Needs over time line chart
-        dates = [need.created_at for need in needs]
-        date_counts = {}
-        for date in dates:
-            date_str = date.strftime('%Y-%m-%d')
-            date_counts[date_str] = date_counts.get(date_str, 0) + 1
-        
-        if date_counts:
-            sorted_dates = sorted(date_counts.items())
-            dates = [item[0] for item in sorted_dates]
-            counts = [item[1] for item in sorted_dates]
-            
-            ax3.plot(dates, counts, marker='o')
-            ax3.set_title('Needs Over Time')
-            ax3.tick_params(axis='x', rotation=45)
-        
-        # Adjust layout and draw
-        self.figure.tight_layout()
-        self.canvas.draw()
+        self.rendered_version = data['version']
+        self.data = data
+
+        empty = data['empty']
+        self.empty_text.set_visible(empty)
+        for ax in (self.ax1, self.ax2, self.ax3):
+            ax.set_visible(not empty)
+        if not empty:
+            self.update_pie(data['fulfilled'], data['pending'])
+            self.update_bars(data['product_counts'])
+            self.update_line(data['date_counts'])
+
+        self.canvas.draw_idle()
+
+    def apply_changes(self, changes):
+        # Patches the drawn series for a change_events.ChangeSet instead of
+        # reloading everything: the pie and the daily line from the changed
+        # needs, the bars with one top-products query when counts moved
+        deltas = changes.statistic_deltas()
+        if deltas is None or self.data is None or self.data['empty'] or changes.touches('products'):
+            self.rendered_version = None
+            self.update_charts()
+            return
+        day_deltas = changes.day_deltas()
+        if not day_deltas:
+            return
+
+        data = dict(self.data)
+        data['version'] = self.db.get_data_version()
+        data['fulfilled'] += deltas['fulfilled_needs']
+        data['pending'] += deltas['pending_needs']
+        if data['fulfilled'] + data['pending'] == 0:
+            self.rendered_version = None
+            self.update_charts()
+            return
+        if deltas['total_needs'] or changes.deleted['needs']:
+            top_products, other = self.db.get_top_products(self.top_n)
+            if other:
+                top_products.append(('Other', other))
+            data['product_counts'] = top_products
+
+        date_counts = dict(data['date_counts'])
+        for day, (total, _) in day_deltas.items():
+            day = datetime(day.year, day.month, day.day)
+            date_counts[day] = date_counts.get(day, 0) + total
+            if not date_counts[day]:
+                del date_counts[day]
+        data['date_counts'] = sorted(date_counts.items())
+        self.render_charts(data)
+
+    def update_pie(self, fulfilled, pending):
+        # Moves the existing wedges and their labels instead of redrawing the pie
+        total = fulfilled + pending
+        angle = 0
+        for wedge, label, percentage, value in zip(
+                self.wedges, self.pie_labels, self.pie_percentages, [fulfilled, pending]):
+            sweep = 360 * value / total
+            wedge.set_theta1(angle)
+            wedge.set_theta2(angle + sweep)
+            middle = math.radians(angle + sweep / 2)
+            label.set_position((1.1 * math.cos(middle), 1.1 * math.sin(middle)))
+            label.set_horizontalalignment('left' if math.cos(middle) >= 0 else 'right')
+            percentage.set_position((0.6 * math.cos(middle), 0.6 * math.sin(middle)))
+            percentage.set_text(f'{100 * value / total:1.1f}%')
+            angle += sweep
+
+    def update_bars(self, product_counts):
+        labels = [name for name, _ in product_counts]
+        counts = [count for _, count in product_counts]
+        if self.bars is not None and len(self.bars) == len(counts):
+            for bar, count in zip(self.bars, counts):
+                bar.set_height(count)
+        else:
+            # The number of bars only changes while there are fewer than top_n products
+            if self.bars is not None:
+                self.bars.remove()
+            self.bars = self.ax2.bar(range(len(counts)), counts)
+        if labels != self.bar_labels:
+            self.ax2.set_xticks(range(len(labels)), labels, rotation=45, horizontalalignment='right')
+            self.bar_labels = labels
+            self.figure.tight_layout()
+        self.ax2.relim()
+        self.ax2.autoscale_view()
+
+    def update_line(self, date_counts):
+        self.line.set_data([day for day, _ in date_counts], [count for _, count in date_counts])
+        self.ax3.relim()
+        self.ax3.autoscale_view()
 
     def update_data(self):
-        self.update_charts() 
\ No newline at end of file
+        self.update_charts()
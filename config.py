@@ -0,0 +1,117 @@
+import configparser
+import os
+
+# Settings come from an INI file (NEEDS_CONFIG, default ./needs.ini) and are
+# overridden by NEEDS_* environment variables, e.g.
+#
+#   [database]
+#   path = /var/lib/needs/needs.db
+#   profile = wal
+#   cache_size = -131072
+#
+#   [auth]
+#   bcrypt_rounds = auto
+#
+#   [sla]
+#   default_hours = 48
+#
+#   NEEDS_DB_PATH=/tmp/needs.db NEEDS_AUTH_BCRYPT_ROUNDS=13 python main.py
+
+# SQLite pragmas applied to every new connection, per profile
+ENGINE_PROFILES = {
+    # SQLite defaults: rollback journal, synchronous=FULL, ~2 MB page cache
+    'legacy': {},
+    # Readers never block the writer and commits skip most fsyncs
+    'wal': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -65536,
+        'mmap_size': 268435456,
+        'temp_store': 'MEMORY',
+        'busy_timeout': 5000,
+    },
+    # For one-off bulk loads: no fsync at all, a crash can corrupt the database
+    'bulk': {
+        'journal_mode': 'WAL',
+        'synchronous': 'OFF',
+        'cache_size': -262144,
+        'mmap_size': 1073741824,
+        'temp_store': 'MEMORY',
+        'busy_timeout': 5000,
+    },
+}
+
+PRAGMAS = ['journal_mode', 'synchronous', 'cache_size', 'mmap_size', 'temp_store', 'busy_timeout']
+
+DEFAULTS = {
+    'path': 'needs.db',
+    'profile': 'wal',
+    'pool_size': 5,
+    'max_overflow': 10,
+    # Record per-action query counts and timings (query_stats.QueryStats)
+    'sql_stats': False,
+    # Needs added within this many ms of each other share one commit; 0 commits each
+    'group_commit_ms': 0,
+}
+
+AUTH_DEFAULTS = {
+    # bcrypt cost factor, or 'auto' to calibrate for target_ms on this host
+    # (at least 12); the calibrated cost is stored in the database on first use
+    'bcrypt_rounds': 12,
+    'target_ms': 250,
+}
+
+SLA_DEFAULTS = {
+    # Hours a need may stay pending before it is reported as stale, for
+    # products without their own SLA (set on the Products tab)
+    'default_hours': 24,
+}
+
+def _settings(filename, section_name, env_prefix):
+    parser = configparser.ConfigParser()
+    parser.read(filename or os.environ.get('NEEDS_CONFIG', 'needs.ini'))
+    section = parser[section_name] if parser.has_section(section_name) else {}
+
+    def setting(name, default=None):
+        return os.environ.get(f'{env_prefix}_{name.upper()}', section.get(name, default))
+
+    return setting
+
+def load_config(filename=None):
+    # Returns {'path', 'profile', 'pool_size', 'max_overflow', 'pragmas', 'sql_stats', 'group_commit_ms'}
+    setting = _settings(filename, 'database', 'NEEDS_DB')
+
+    profile = setting('profile', DEFAULTS['profile'])
+    if profile not in ENGINE_PROFILES:
+        raise ValueError(f"Unknown database profile '{profile}', expected one of {', '.join(ENGINE_PROFILES)}")
+    pragmas = dict(ENGINE_PROFILES[profile])
+    for name in PRAGMAS:
+        value = setting(name)
+        if value is not None:
+            pragmas[name] = value
+
+    return {
+        'path': setting('path', DEFAULTS['path']),
+        'profile': profile,
+        'pool_size': int(setting('pool_size', DEFAULTS['pool_size'])),
+        'max_overflow': int(setting('max_overflow', DEFAULTS['max_overflow'])),
+        'pragmas': pragmas,
+        'sql_stats': str(setting('sql_stats', DEFAULTS['sql_stats'])).lower() in ('1', 'true', 'yes', 'on'),
+        'group_commit_ms': int(setting('group_commit_ms', DEFAULTS['group_commit_ms'])),
+    }
+
+def load_auth_config(filename=None):
+    # Returns {'bcrypt_rounds': int or 'auto', 'target_ms': int}
+    setting = _settings(filename, 'auth', 'NEEDS_AUTH')
+    rounds = setting('bcrypt_rounds', AUTH_DEFAULTS['bcrypt_rounds'])
+    return {
+        'bcrypt_rounds': rounds if rounds == 'auto' else int(rounds),
+        'target_ms': int(setting('target_ms', AUTH_DEFAULTS['target_ms'])),
+    }
+
+def load_sla_config(filename=None):
+    # Returns {'default_hours': int}
+    setting = _settings(filename, 'sla', 'NEEDS_SLA')
+    return {
+        'default_hours': int(setting('default_hours', SLA_DEFAULTS['default_hours'])),
+    }
@@ -1,96 +1,336 @@
-import pandas as pd
+import csv
+import os
+import time
+from contextlib import contextmanager
 from datetime import datetime
-from database import Database, Customer, Product, Need
+from database import Database, Customer, Product
+
+# pandas is imported by the methods that use it (CSV imports and the
+# DataFrame helpers), so exports and the command line start without it
+
+EXPORT_DATASETS = ['needs', 'customers', 'products']
+
+# File extension -> export format
+EXPORT_FORMATS = {
+    '.csv': 'csv',
+    '.xlsx': 'xlsx',
+    '.parquet': 'parquet',
+    '.feather': 'feather',
+    '.arrow': 'feather',
+}
+
+XLSX_MAX_ROWS = 1048576
+PARQUET_ROW_GROUP_SIZE = 100000
+
+# Arrow column types for the typed (Parquet/Feather) exports; other columns are strings
+ARROW_COLUMN_TYPES = {
+    'Created At': 'timestamp',
+    'Fulfilled At': 'timestamp',
+    'Fulfilled': 'bool',
+    'Total Requests': 'int64',
+    'Pending Requests': 'int64',
+    'Fulfilled Requests': 'int64',
+}
+
+def export_format(filename):
+    ext = os.path.splitext(filename)[1].lower()
+    if ext not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export file type '{ext}', expected one of {', '.join(EXPORT_FORMATS)}")
+    return EXPORT_FORMATS[ext]
+
+def arrow_schema(columns):
+    # pyarrow is only needed for the columnar exports, so it is imported here
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise RuntimeError("Parquet and Feather exports need pyarrow (pip install pyarrow)")
+    types = {'timestamp': pa.timestamp('us'), 'bool': pa.bool_(), 'int64': pa.int64()}
+    return pa, pa.schema([(name, types.get(ARROW_COLUMN_TYPES.get(name), pa.string())) for name in columns])
+
+def arrow_batch(pa, schema, chunk):
+    # Builds the record batch column by column straight from the row tuples
+    columns = list(zip(*chunk)) or [[] for _ in schema]
+    return pa.RecordBatch.from_arrays(
+        [pa.array(values, type=field.type) for values, field in zip(columns, schema)], schema=schema)
+
+class RejectionWriter:
+    # Collects rejected import rows in a temporary file that becomes
+    # "<name>_rejected.csv" next to the input file only when the import
+    # committed; a failed or cancelled import leaves no report behind
+    def __init__(self, filename):
+        root, ext = os.path.splitext(filename)
+        self.filename = f"{root}_rejected{ext or '.csv'}"
+        self.partial = f"{self.filename}.partial"
+        self.count = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None and self.count:
+            os.replace(self.partial, self.filename)
+        elif os.path.exists(self.partial):
+            os.remove(self.partial)
+        return False
+
+    def write(self, rejected):
+        # rejected is a DataFrame
+        if rejected.empty:
+            return
+        rejected.to_csv(self.partial, mode='a' if self.count else 'w',
+                        header=not self.count, index=False)
+        self.count += len(rejected)
 
 class DataManager:
+    chunk_size = 5000
+
     def __init__(self, db):
         self.db = db
 
-    def export_customers_to_csv(self, filename):
-        customers = self.db.get_all_customers()
-        data = []
-        for customer in customers:
-            needs = self.db.get_customer_needs(customer.id)
-            needs_text = ", ".join([f"{need.product.name} ({'Fulfilled' if need.is_fulfilled else 'Pending'})" 
-                                  for need in needs])
-            data.append({
-                'Name': customer.name,
-                'Phone': customer.phone,
-                'Created At': customer.created_at,
-                'Needs': needs_text
-            })
-        
-        df = pd.DataFrame(data)
-        df.to_csv(filename, index=False)
-        return True
+    def export_customers_to_csv(self, filename, progress=None):
+        return self.export_data('customers', filename, progress, 'csv')
 
-    def export_products_to_csv(self, filename):
-        products = self.db.get_all_products()
-        data = []
-        for product in products:
-            needs = self.db.session.query(Need).filter_by(product_id=product.id).all()
-            pending_count = sum(1 for need in needs if not need.is_fulfilled)
-            fulfilled_count = sum(1 for need in needs if need.is_fulfilled)
-            
-            data.append({
-                'Product Name': product.name,
-                'Created At': product.created_at,
-                'Total Requests': len(needs),
-                'Pending Requests': pending_count,
-                'Fulfilled Requests': fulfilled_count
-            })
-        
-        df = pd.DataFrame(data)
-        df.to_csv(filename, index=False)
-        return True
+    def export_products_to_csv(self, filename, progress=None):
+        return self.export_data('products', filename, progress, 'csv')
 
-    def export_needs_to_csv(self, filename):
-        needs = self.db.session.query(Need).all()
-        data = []
-        for need in needs:
-            data.append({
-                'Customer Name': need.customer.name,
-                'Customer Phone': need.customer.phone,
-                'Product': need.product.name,
-                'Status': 'Fulfilled' if need.is_fulfilled else 'Pending',
-                'Created At': need.created_at,
-                'Fulfilled At': need.fulfilled_at if need.is_fulfilled else ''
-            })
-        
-        df = pd.DataFrame(data)
-        df.to_csv(filename, index=False)
-        return True
+    def export_needs_to_csv(self, filename, progress=None):
+        return self.export_data('needs', filename, progress, 'csv')
 
-    def import_customers_from_csv(self, filename):
-        df = pd.read_csv(filename)
-        for _, row in df.iterrows():
-            try:
-                self.db.add_customer(row['Name'], row['Phone'])
-            except Exception as e:
-                print(f"Error importing customer {row['Name']}: {str(e)}")
-        return True
+    def export_data(self, dataset, filename, progress=None, file_format=None):
+        # dataset is one of EXPORT_DATASETS; the format defaults to the one
+        # matching the file extension (see EXPORT_FORMATS)
+        file_format = file_format or export_format(filename)
+        columns, chunks, total = self._export_source(dataset, typed=file_format in ('parquet', 'feather'))
+        writer = {'csv': self._csv_writer, 'xlsx': self._xlsx_writer,
+                  'parquet': self._parquet_writer, 'feather': self._feather_writer}[file_format]
+        return self._write_chunks(filename, writer(filename, columns, dataset.capitalize()),
+                                  chunks, total, progress)
+
+    def _export_source(self, dataset, typed=False):
+        # Returns (columns, chunks, total). Typed sources keep booleans and
+        # datetimes as values instead of display text, for the columnar formats.
+        stats = self.db.get_statistics()
+        if dataset == 'customers':
+            return (['Name', 'Phone', 'Created At', 'Needs'], self._customer_rows(), stats['total_customers'])
+        if dataset == 'products':
+            return (['Product Name', 'Created At', 'Total Requests', 'Pending Requests', 'Fulfilled Requests'],
+                    self.db.iter_product_need_counts(self.chunk_size), stats['total_products'])
+        if dataset == 'needs' and typed:
+            return (['Customer Name', 'Customer Phone', 'Product', 'Fulfilled', 'Created At', 'Fulfilled At'],
+                    self.db.iter_need_rows(self.chunk_size), stats['total_needs'])
+        if dataset == 'needs':
+            return (['Customer Name', 'Customer Phone', 'Product', 'Status', 'Created At', 'Fulfilled At'],
+                    self._need_rows(), stats['total_needs'])
+        raise ValueError(f"Unknown dataset '{dataset}', expected one of {', '.join(EXPORT_DATASETS)}")
+
+    def _customer_rows(self):
+        after_id = 0
+        while True:
+            customers = self.db.get_customers_with_needs(after_id, self.chunk_size, pending_only=False)
+            if not customers:
+                return
+            chunk = []
+            for customer, needs in customers:
+                needs_text = ", ".join([f"{product_name} ({'Fulfilled' if is_fulfilled else 'Pending'})" 
+                                      for product_name, is_fulfilled in needs])
+                chunk.append((customer.name, customer.phone, customer.created_at, needs_text))
+            yield chunk
+            after_id = customers[-1][0].id
 
-    def import_products_from_csv(self, filename):
-        df = pd.read_csv(filename)
-        for _, row in df.iterrows():
-            try:
-                self.db.add_product(row['Product Name'])
-            except Exception as e:
-                print(f"Error importing product {row['Product Name']}: {str(e)}")
+    def _need_rows(self):
+        for chunk in self.db.iter_need_rows(self.chunk_size):
+            yield [(customer_name, customer_phone, product_name,
+                    'Fulfilled' if is_fulfilled else 'Pending',
+                    created_at, fulfilled_at if is_fulfilled else '')
+                   for customer_name, customer_phone, product_name, is_fulfilled, created_at, fulfilled_at in chunk]
+
+    def _write_chunks(self, filename, writer, chunks, total=None, progress=None):
+        # Writes one chunk at a time so memory stays flat regardless of row count;
+        # progress(rows_written, total) is called after every chunk and may raise
+        # to abort the export, in which case the partial file is removed
+        written = 0
+        try:
+            with writer as write_chunk:
+                for chunk in chunks:
+                    write_chunk(chunk)
+                    written += len(chunk)
+                    if progress:
+                        progress(written, total)
+        except BaseException:
+            if os.path.exists(filename):
+                os.remove(filename)
+            raise
         return True
 
+    @contextmanager
+    def _csv_writer(self, filename, columns, title):
+        # The csv module writes the row tuples as they come, without building
+        # a DataFrame per chunk
+        with open(filename, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            yield writer.writerows
+
+    @contextmanager
+    def _xlsx_writer(self, filename, columns, title):
+        # Write-only workbooks stream rows to disk instead of keeping every cell
+        # in memory; rows past Excel's sheet limit continue on a new sheet
+        from openpyxl import Workbook
+        workbook = Workbook(write_only=True)
+        sheet = None
+        rows = 0
+
+        def write_chunk(chunk):
+            nonlocal sheet, rows
+            for row in chunk:
+                if sheet is None or rows == XLSX_MAX_ROWS:
+                    sheet = workbook.create_sheet(title if sheet is None else f"{title} ({len(workbook.worksheets) + 1})")
+                    sheet.append(columns)
+                    rows = 1
+                sheet.append(tuple(row))
+                rows += 1
+
+        try:
+            yield write_chunk
+        except BaseException:
+            # Finish the sheets' temporary files so nothing is left half-written
+            for worksheet in workbook.worksheets:
+                worksheet.close()
+            raise
+        if sheet is None:
+            workbook.create_sheet(title).append(columns)
+        workbook.save(filename)
+
+    @contextmanager
+    def _parquet_writer(self, filename, columns, title):
+        # Chunks are gathered into row groups of PARQUET_ROW_GROUP_SIZE rows;
+        # tiny row groups would make the file bigger and slower to scan
+        pa, schema = arrow_schema(columns)
+        import pyarrow.parquet as pq
+        batches = []
+        pending = 0
+        with pq.ParquetWriter(filename, schema) as writer:
+            def write_chunk(chunk):
+                nonlocal pending
+                batches.append(arrow_batch(pa, schema, chunk))
+                pending += len(chunk)
+                if pending >= PARQUET_ROW_GROUP_SIZE:
+                    writer.write_table(pa.Table.from_batches(batches, schema))
+                    batches.clear()
+                    pending = 0
+
+            yield write_chunk
+            if batches:
+                writer.write_table(pa.Table.from_batches(batches, schema))
+
+    @contextmanager
+    def _feather_writer(self, filename, columns, title):
+        # Feather v2 is the Arrow IPC file format; lz4 matches pandas' to_feather
+        pa, schema = arrow_schema(columns)
+        options = pa.ipc.IpcWriteOptions(compression='lz4')
+        with pa.ipc.new_file(filename, schema, options=options) as writer:
+            yield lambda chunk: writer.write_batch(arrow_batch(pa, schema, chunk))
+
+    def import_customers_from_csv(self, filename, progress=None):
+        import pandas as pd
+        started = time.perf_counter()
+        seen_phones = set()
+
+        def chunks():
+            read = 0
+            for df in pd.read_csv(filename, chunksize=self.chunk_size, dtype={'Phone': str, 'Name': str}):
+                clean, rejected = self._validate_customers(df, seen_phones)
+                rejections.write(rejected)
+                yield clean.to_dict('records')
+                read += len(df)
+                if progress:
+                    progress(read, None)
+
+        with RejectionWriter(filename) as rejections:
+            imported = self.db.bulk_add_customers(chunks())
+        return self._import_report(imported, rejections, started)
+
+    def import_products_from_csv(self, filename, progress=None):
+        import pandas as pd
+        started = time.perf_counter()
+        seen_names = set()
+
+        def chunks():
+            read = 0
+            for df in pd.read_csv(filename, chunksize=self.chunk_size, dtype={'Product Name': str}):
+                clean, rejected = self._validate_products(df, seen_names)
+                rejections.write(rejected)
+                yield clean.to_dict('records')
+                read += len(df)
+                if progress:
+                    progress(read, None)
+
+        with RejectionWriter(filename) as rejections:
+            imported = self.db.bulk_add_products(chunks())
+        return self._import_report(imported, rejections, started)
+
+    def _validate_customers(self, df, seen_phones):
+        # Works on whole columns: returns the clean {'name', 'phone'} frame and
+        # the rejected input rows with a Reason column
+        import pandas as pd
+        names = df['Name'].astype('string').str.strip()
+        phones = df['Phone'].astype('string').str.replace(r'[\s().-]', '', regex=True)
+        valid_format = phones.str.match(Database.PHONE_PATTERN).fillna(False).astype(bool)
+
+        reasons = pd.Series(pd.NA, index=df.index, dtype='string')
+        reasons = reasons.mask(names.isna() | (names == ''), 'Missing name')
+        reasons = reasons.mask(reasons.isna() & phones.isna(), 'Missing phone')
+        reasons = reasons.mask(reasons.isna() & ~valid_format, 'Invalid phone number format')
+        duplicated = phones.where(reasons.isna()).duplicated() | phones.isin(seen_phones)
+        reasons = reasons.mask(reasons.isna() & duplicated, 'Duplicate phone in file')
+        existing = self.db.get_existing_phones(phones[reasons.isna()])
+        reasons = reasons.mask(reasons.isna() & phones.isin(existing), 'Phone already exists')
+
+        clean = reasons.isna()
+        seen_phones.update(phones[clean])
+        return (pd.DataFrame({'name': names[clean], 'phone': phones[clean]}),
+                df[~clean].assign(Reason=reasons[~clean]))
+
+    def _validate_products(self, df, seen_names):
+        import pandas as pd
+        names = df['Product Name'].astype('string').str.strip()
+
+        reasons = pd.Series(pd.NA, index=df.index, dtype='string')
+        reasons = reasons.mask(names.isna() | (names == ''), 'Missing product name')
+        duplicated = names.where(reasons.isna()).duplicated() | names.isin(seen_names)
+        reasons = reasons.mask(reasons.isna() & duplicated, 'Duplicate product in file')
+        existing = self.db.get_existing_product_names(names[reasons.isna()])
+        reasons = reasons.mask(reasons.isna() & names.isin(existing), 'Product already exists')
+
+        clean = reasons.isna()
+        seen_names.update(names[clean])
+        return (pd.DataFrame({'name': names[clean]}),
+                df[~clean].assign(Reason=reasons[~clean]))
+
+    def _import_report(self, imported, rejections, started):
+        seconds = time.perf_counter() - started
+        return {
+            'imported': imported,
+            'rejected': rejections.count,
+            'rejected_file': rejections.filename if rejections.count else None,
+            'seconds': seconds,
+            'rows_per_second': imported / seconds if seconds else 0
+        }
+
     def get_statistics_dataframe(self):
+        import pandas as pd
         stats = self.db.get_statistics()
         return pd.DataFrame([stats])
 
     def get_recent_activity_dataframe(self, limit=10):
-        needs = self.db.session.query(Need).order_by(Need.created_at.desc()).limit(limit).all()
+        import pandas as pd
+        needs = self.db.get_recent_activity(limit)
         data = []
-        for need in needs:
+        for customer_name, product_name, is_fulfilled, created_at, fulfilled_at in needs:
             data.append({
-                'Customer': need.customer.name,
-                'Product': need.product.name,
-                'Status': 'Fulfilled' if need.is_fulfilled else 'Pending',
-                'Date': need.fulfilled_at if need.is_fulfilled else need.created_at
+                'Customer': customer_name,
+                'Product': product_name,
+                'Status': 'Fulfilled' if is_fulfilled else 'Pending',
+                'Date': fulfilled_at if is_fulfilled else created_at
             })
-        return pd.DataFrame(data) 
\ No newline at end of file
+        return pd.DataFrame(data)
\ No newline at end of file
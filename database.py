@@ -1,11 +1,25 @@
-from sqlalchemy import create_engine, Column, Integer, String, Boolean, ForeignKey, DateTime
+from sqlalchemy import (create_engine, Column, Integer, String, Boolean, ForeignKey, DateTime, Index,
+                        table, column, literal_column, select, func, case, insert, text, or_, event)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship
+from sqlalchemy.orm import sessionmaker, relationship, joinedload
+from contextlib import contextmanager
 from datetime import datetime
+from config import load_config
+from query_stats import QueryStats
+from change_events import ChangeBus
+from product_cache import ProductCache
+from migrations import (run_migrations, has_table, count_statistics, rebuild_statistic_counters,
+                        rebuild_daily_need_counts)
 import re
+import sqlite3
+import threading
 
 Base = declarative_base()
 
+# INSERT ... RETURNING needs SQLite 3.35; older builds insert, then select
+SQLITE_HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35)
+
 class Customer(Base):
     __tablename__ = 'customers'
     
@@ -15,6 +29,10 @@ class Customer(Base):
     needs = relationship("Need", back_populates="customer")
     created_at = Column(DateTime, default=datetime.now)
 
+    __table_args__ = (
+        Index('ix_customers_phone', 'phone'),
+    )
+
 class Product(Base):
     __tablename__ = 'products'
     
@@ -22,6 +40,8 @@ class Product(Base):
     name = Column(String, nullable=False, unique=True)
     needs = relationship("Need", back_populates="product")
     created_at = Column(DateTime, default=datetime.now)
+    # Hours a need may stay pending before it is reported as stale; NULL uses the default
+    sla_hours = Column(Integer, nullable=True)
 
 class Need(Base):
     __tablename__ = 'needs'
@@ -36,98 +56,547 @@ class Need(Base):
     customer = relationship("Customer", back_populates="needs")
     product = relationship("Product", back_populates="needs")
 
+    __table_args__ = (
+        Index('ix_needs_product_fulfilled', 'product_id', 'is_fulfilled'),
+        Index('ix_needs_customer_fulfilled', 'customer_id', 'is_fulfilled'),
+        Index('ix_needs_created_at', 'created_at'),
+        Index('ix_needs_pending_created_at', 'created_at', sqlite_where=text('is_fulfilled = 0')),
+    )
+
+class StatisticCounter(Base):
+    __tablename__ = 'statistics'
+
+    name = Column(String, primary_key=True)
+    value = Column(Integer, nullable=False, default=0)
+
+class NeedDailyCount(Base):
+    __tablename__ = 'need_daily_counts'
+
+    day = Column(String, primary_key=True)
+    total = Column(Integer, nullable=False, default=0)
+    fulfilled = Column(Integer, nullable=False, default=0)
+
+# External-content FTS5 index over customers(name, phone), kept in sync by triggers
+customers_fts = table('customers_fts', column('rowid'), column('rank'))
+
+def create_database_engine(config):
+    # QueuePool keeps a few connections open so concurrent readers (GUI and
+    # worker jobs) each get their own; the profile's pragmas are applied to
+    # every new connection
+    engine = create_engine(f"sqlite:///{config['path']}",
+                           pool_size=config['pool_size'],
+                           max_overflow=config['max_overflow'])
+    pragmas = config['pragmas']
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+        cursor.close()
+
+    return engine
+
 class Database:
-    def __init__(self):
-        self.engine = create_engine('sqlite:///needs.db')
-        Base.metadata.create_all(self.engine)
-        Session = sessionmaker(bind=self.engine)
-        self.session = Session()
+    def __init__(self, engine=None, config=None):
+        # Passing an existing engine shares it with another Database object;
+        # the schema is then assumed to be up to date
+        self.query_stats = None
+        self.group_commit_ms = 0
+        if engine is None:
+            config = config or load_config()
+            engine = create_database_engine(config)
+            Base.metadata.create_all(engine)
+            run_migrations(engine)
+            if config.get('sql_stats'):
+                self.query_stats = QueryStats(engine)
+            self.group_commit_ms = config.get('group_commit_ms', 0)
+        self.engine = engine
+        self.has_customer_search_index = has_table(self.engine, 'customers_fts')
+        # Every call opens its own short-lived session, so no identity map
+        # outlives a unit of work and a Database can be shared across threads.
+        # Returned objects are detached but keep their loaded attributes.
+        self.Session = sessionmaker(bind=self.engine, expire_on_commit=False)
+        # Publishes a change_events.ChangeSet after every commit that changed rows
+        self.changes = ChangeBus()
+        self.changes.watch(self.Session)
+        self.product_ids = ProductCache(self._product_names)
+        self.product_ids.reload()
+        # The bulk insert transaction open on this thread, if any
+        self.local = threading.local()
+
+    @contextmanager
+    def session_scope(self):
+        # Read-write unit of work: commits on success, rolls back on error
+        session = self.Session()
+        try:
+            yield session
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    @contextmanager
+    def read_session(self):
+        # Read-only unit of work: nothing is committed, and every loaded object
+        # is expunged when the block ends
+        session = self.Session()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    # Basic phone number validation
+    PHONE_PATTERN = r'^\+?1?\d{9,15}$'
 
     def validate_phone(self, phone):
-        # Basic phone number validation
-        return bool(re.match(r'^\+?1?\d{9,15}$', phone))
+        return bool(re.match(self.PHONE_PATTERN, phone))
 
     def add_customer(self, name, phone):
         if not self.validate_phone(phone):
             raise ValueError("Invalid phone number format")
         customer = Customer(name=name, phone=phone)
-        self.session.add(customer)
-        self.session.commit()
+        with self.session_scope() as session:
+            session.add(customer)
         return customer
 
     def add_product(self, name):
+        if self.product_ids.get(name) is not None:
+            raise ValueError(f"Product '{name}' already exists")
         product = Product(name=name)
-        self.session.add(product)
-        self.session.commit()
+        with self.session_scope() as session:
+            session.add(product)
+        self.product_ids.add(product.name, product.id)
         return product
 
+    def get_or_create_product(self, name):
+        # Returns the id of the named product, inserting it if it is new; safe
+        # against another writer inserting the same name concurrently
+        product_id = self.product_ids.get(name)
+        if product_id is None:
+            with self.session_scope() as session:
+                product_id = self._get_or_create_product(session, name)
+            self.product_ids.add(name, product_id)
+        return product_id
+
+    def _get_or_create_product(self, session, name):
+        statement = sqlite_insert(Product).values(name=name).on_conflict_do_nothing(index_elements=['name'])
+        if SQLITE_HAS_RETURNING:
+            product_id = session.execute(statement.returning(Product.id)).scalar()
+            inserted = product_id is not None
+        else:
+            product_id = None
+            inserted = session.execute(statement).rowcount == 1
+        if product_id is None:
+            product_id = session.query(Product.id).filter_by(name=name).scalar()
+        if inserted:
+            # Core statements bypass the flush the change bus listens to
+            ChangeBus.mark_inserted(session, Product.__tablename__, product_id)
+        return product_id
+
+    def resolve_product(self, name):
+        # Product id for name, or None. Cached names cost no query; a miss is
+        # checked against the table, since another process may have added it
+        product_id = self.product_ids.get(name)
+        if product_id is None:
+            product = self.get_product_by_name(name)
+            if product is not None:
+                product_id = product.id
+                self.product_ids.add(product.name, product_id)
+        return product_id
+
+    def _product_names(self):
+        with self.read_session() as session:
+            return session.query(Product.id, Product.name).all()
+
+    def bulk_add_customers(self, chunks):
+        # Inserts chunks of {'name': ..., 'phone': ...} dicts with one executemany
+        # per chunk, all in a single transaction: either every row lands or none
+        return self._bulk_insert(insert(Customer), chunks)
+
+    def bulk_add_products(self, chunks):
+        # Names that already exist are skipped instead of aborting the import
+        statement = sqlite_insert(Product).on_conflict_do_nothing(index_elements=['name'])
+        try:
+            return self._bulk_insert(statement, chunks)
+        finally:
+            self.product_ids.invalidate()
+
+    def _bulk_insert(self, statement, chunks):
+        inserted = 0
+        with self.session_scope() as session:
+            ChangeBus.mark_bulk(session, statement.table.name)
+            # Chunks are produced inside the transaction and may look up
+            # existing values (see _existing_values)
+            self.local.bulk_session = session
+            try:
+                for chunk in chunks:
+                    if chunk:
+                        inserted += session.connection().execute(statement, chunk).rowcount
+            finally:
+                self.local.bulk_session = None
+        return inserted
+
+    def get_existing_phones(self, phones):
+        return self._existing_values(Customer.phone, phones)
+
+    def get_existing_product_names(self, names):
+        return self._existing_values(Product.name, names)
+
+    def _existing_values(self, column, values):
+        # Indexed IN lookups in chunks, to stay under SQLite's bound-parameter limit
+        # While a bulk insert is open on this thread, the lookup must use its
+        # connection: a second connection would wait on the writer's lock under
+        # a rollback journal, and the writer waits for the lookup
+        session = getattr(self.local, 'bulk_session', None)
+        if session is not None:
+            return self._query_existing(session, column, values)
+        with self.read_session() as session:
+            return self._query_existing(session, column, values)
+
+    def _query_existing(self, session, column, values):
+        existing = set()
+        values = list(set(values))
+        for start in range(0, len(values), 500):
+            chunk = values[start:start + 500]
+            existing.update(value for (value,) in session.query(column).filter(column.in_(chunk)))
+        return existing
+
     def add_need(self, customer_id, product_id):
         need = Need(customer_id=customer_id, product_id=product_id)
-        self.session.add(need)
-        self.session.commit()
+        with self.session_scope() as session:
+            session.add(need)
         return need
 
+    def add_customer_need(self, name, phone, product_name):
+        # The customer, the product if it is new and the need, in one commit
+        return self.add_customer_needs([(name, phone, product_name)])[0]
+
+    def add_customer_needs(self, entries):
+        # Records (name, phone, product_name) submissions in one transaction:
+        # either every customer, product and need lands or none does
+        for _, phone, _ in entries:
+            if not self.validate_phone(phone):
+                raise ValueError(f"Invalid phone number format: {phone}")
+        needs = []
+        created = {}
+        with self.session_scope() as session:
+            for name, phone, product_name in entries:
+                product_id = self.product_ids.get(product_name) or created.get(product_name)
+                if product_id is None:
+                    product_id = created[product_name] = self._get_or_create_product(session, product_name)
+                customer = Customer(name=name, phone=phone)
+                need = Need(customer=customer, product_id=product_id)
+                session.add(need)
+                needs.append(need)
+        for product_name, product_id in created.items():
+            self.product_ids.add(product_name, product_id)
+        return needs
+
     def get_customers_needing_product(self, product_name):
-        return self.session.query(Customer).join(Need).join(Product).filter(
-            Product.name == product_name,
-            Need.is_fulfilled == False
-        ).all()
+        with self.read_session() as session:
+            return session.query(Customer).join(Need).join(Product).filter(
+                Product.name == product_name,
+                Need.is_fulfilled == False
+            ).all()
 
     def mark_need_fulfilled(self, customer_id, product_id):
-        need = self.session.query(Need).filter_by(
-            customer_id=customer_id,
-            product_id=product_id,
-            is_fulfilled=False
-        ).first()
-        if need:
-            need.is_fulfilled = True
-            need.fulfilled_at = datetime.now()
-            self.session.commit()
-            return True
+        with self.session_scope() as session:
+            need = session.query(Need).filter_by(
+                customer_id=customer_id,
+                product_id=product_id,
+                is_fulfilled=False
+            ).first()
+            if need:
+                need.is_fulfilled = True
+                need.fulfilled_at = datetime.now()
+                return True
         return False
 
+    def get_product_by_name(self, name):
+        with self.read_session() as session:
+            return session.query(Product).filter_by(name=name).first()
+
     def get_all_products(self):
-        return self.session.query(Product).all()
+        with self.read_session() as session:
+            return session.query(Product).all()
 
     def get_all_customers(self):
-        return self.session.query(Customer).all()
+        with self.read_session() as session:
+            return session.query(Customer).all()
+
+    def get_products_page(self, after_id, limit):
+        with self.read_session() as session:
+            return session.query(Product).filter(
+                Product.id > after_id
+            ).order_by(Product.id).limit(limit).all()
+
+    def get_products_by_ids(self, product_ids):
+        with self.read_session() as session:
+            return session.query(Product).filter(
+                Product.id.in_(list(product_ids))
+            ).order_by(Product.id).all()
+
+    def get_customers_by_ids(self, customer_ids, pending_only=True):
+        # Same (customer, needs) pairs as get_customers_with_needs, for given ids
+        customer_ids = list(customer_ids)
+        with self.read_session() as session:
+            customers = session.query(Customer).filter(
+                Customer.id.in_(customer_ids)
+            ).order_by(Customer.id).all()
+            needs = self._needs_by_customer(session, Need.customer_id.in_(customer_ids), pending_only)
+        return [(customer, needs.get(customer.id, [])) for customer in customers]
+
+    def get_customers_with_needs(self, after_id=0, limit=None, pending_only=True):
+        # Returns (customer, [(product_name, is_fulfilled), ...]) pairs in two queries
+        with self.read_session() as session:
+            query = session.query(Customer).filter(
+                Customer.id > after_id
+            ).order_by(Customer.id)
+            if limit:
+                query = query.limit(limit)
+            customers = query.all()
+            if not customers:
+                return []
+            needs = self._needs_by_customer(
+                session, Need.customer_id.between(customers[0].id, customers[-1].id), pending_only)
+        return [(customer, needs.get(customer.id, [])) for customer in customers]
+
+    def get_needs_for_customers(self, customer_ids, pending_only=True):
+        # Returns {customer_id: [(product_name, is_fulfilled), ...]}
+        needs = {}
+        customer_ids = list(customer_ids)
+        with self.read_session() as session:
+            for start in range(0, len(customer_ids), 500):
+                chunk = customer_ids[start:start + 500]
+                needs.update(self._needs_by_customer(session, Need.customer_id.in_(chunk), pending_only))
+        return needs
+
+    def _check_daily_need_counts(self, conn):
+        day = func.date(Need.created_at)
+        actual = {row[0]: tuple(row[1:]) for row in conn.execute(
+            select(day, func.count(Need.id), func.sum(case((Need.is_fulfilled == True, 1), else_=0))
+                   ).where(Need.created_at.isnot(None)).group_by(day))}
+        rolled = {row[0]: tuple(row[1:]) for row in conn.execute(
+            select(NeedDailyCount.day, NeedDailyCount.total, NeedDailyCount.fulfilled
+                   ).where(NeedDailyCount.total != 0))}
+        return {f'need_daily_counts[{day}]': (rolled.get(day), actual.get(day))
+                for day in set(actual) | set(rolled) if rolled.get(day) != actual.get(day)}
+
+    def _needs_by_customer(self, session, criterion, pending_only):
+        query = session.query(Need.customer_id, Product.name, Need.is_fulfilled).join(
+            Product, Need.product_id == Product.id
+        ).filter(criterion)
+        if pending_only:
+            query = query.filter(Need.is_fulfilled == False)
+        needs = {}
+        for customer_id, product_name, is_fulfilled in query.order_by(Need.id):
+            needs.setdefault(customer_id, []).append((product_name, is_fulfilled))
+        return needs
+
+    def get_recent_activity(self, limit=10):
+        # Returns [(customer_name, product_name, is_fulfilled, created_at, fulfilled_at), ...]
+        # for the most recently created needs
+        with self.read_session() as session:
+            return session.query(
+                Customer.name, Product.name, Need.is_fulfilled, Need.created_at, Need.fulfilled_at
+            ).select_from(Need).outerjoin(
+                Customer, Need.customer_id == Customer.id
+            ).outerjoin(
+                Product, Need.product_id == Product.id
+            ).order_by(Need.created_at.desc()).limit(limit).all()
+
+    def get_needs_between(self, start, end):
+        # Returns [(customer_name, product_name, is_fulfilled, created_at), ...]
+        # for needs created in [start, end)
+        with self.read_session() as session:
+            return session.query(
+                Customer.name, Product.name, Need.is_fulfilled, Need.created_at
+            ).select_from(Need).outerjoin(
+                Customer, Need.customer_id == Customer.id
+            ).outerjoin(
+                Product, Need.product_id == Product.id
+            ).filter(
+                Need.created_at >= start,
+                Need.created_at < end
+            ).order_by(Need.created_at).all()
+
+    def iter_need_rows(self, chunk_size=1000):
+        # Yields chunks of (customer_name, customer_phone, product_name,
+        # is_fulfilled, created_at, fulfilled_at) tuples without building ORM objects
+        statement = select(
+            Customer.name, Customer.phone, Product.name,
+            Need.is_fulfilled, Need.created_at, Need.fulfilled_at
+        ).select_from(Need).outerjoin(
+            Customer, Need.customer_id == Customer.id
+        ).outerjoin(
+            Product, Need.product_id == Product.id
+        ).order_by(Need.id)
+        with self.read_session() as session:
+            result = session.execute(statement.execution_options(yield_per=chunk_size))
+            yield from result.partitions()
+
+    def iter_product_need_counts(self, chunk_size=1000):
+        # Yields chunks of (product_name, created_at, total, pending, fulfilled) tuples
+        fulfilled = func.coalesce(func.sum(case((Need.is_fulfilled == True, 1), else_=0)), 0)
+        statement = select(
+            Product.name, Product.created_at, func.count(Need.id),
+            func.count(Need.id) - fulfilled, fulfilled
+        ).outerjoin(
+            Need, Need.product_id == Product.id
+        ).group_by(Product.id).order_by(Product.id)
+        with self.read_session() as session:
+            result = session.execute(statement.execution_options(yield_per=chunk_size))
+            yield from result.partitions()
+
+    def get_top_products(self, limit):
+        # Returns ([(product_name, need_count), ...] for the `limit` most needed
+        # products, count of needs for every other product) in one query
+        with self.read_session() as session:
+            counts = session.query(
+                Product.name.label('name'), func.count(Need.id).label('count')
+            ).join(Need, Need.product_id == Product.id).group_by(Product.id).subquery()
+            rows = session.query(
+                counts.c.name, counts.c.count, func.sum(counts.c.count).over()
+            ).order_by(counts.c.count.desc(), counts.c.name).limit(limit).all()
+        if not rows:
+            return [], 0
+        total = rows[0][2]
+        top = [(name, count) for name, count, _ in rows]
+        return top, total - sum(count for _, count in top)
+
+    def get_need_counts_by_day(self, start=None, end=None):
+        # Returns [('YYYY-MM-DD', total, pending), ...] for the days in [start, end),
+        # read from the trigger-maintained need_daily_counts rollup
+        with self.read_session() as session:
+            query = session.query(
+                NeedDailyCount.day, NeedDailyCount.total, NeedDailyCount.total - NeedDailyCount.fulfilled
+            ).filter(NeedDailyCount.total > 0)
+            if start is not None:
+                query = query.filter(NeedDailyCount.day >= start.strftime('%Y-%m-%d'))
+            if end is not None:
+                query = query.filter(NeedDailyCount.day < end.strftime('%Y-%m-%d'))
+            return query.order_by(NeedDailyCount.day).all()
+
+    def get_sla_thresholds(self):
+        # Returns {sla_hours: [product_id, ...]} for products with their own SLA
+        thresholds = {}
+        with self.read_session() as session:
+            for hours, product_id in session.query(Product.sla_hours, Product.id).filter(
+                    Product.sla_hours.isnot(None)):
+                thresholds.setdefault(hours, []).append(product_id)
+        return thresholds
+
+    def set_product_sla(self, product_id, hours):
+        # hours None returns the product to the configured default
+        if hours is not None and hours <= 0:
+            raise ValueError("SLA hours must be a positive number")
+        with self.session_scope() as session:
+            product = session.get(Product, product_id)
+            if product:
+                product.sla_hours = hours
+                return True
+        return False
+
+    def count_stale_needs(self, cutoff, after=None, product_ids=None, exclude_product_ids=None):
+        # Counts pending needs created in (after, cutoff], served by the partial
+        # ix_needs_pending_created_at index
+        with self.read_session() as session:
+            query = session.query(func.count(Need.id)).filter(
+                Need.is_fulfilled == False,
+                Need.created_at <= cutoff
+            )
+            if after is not None:
+                query = query.filter(Need.created_at > after)
+            if product_ids is not None:
+                query = query.filter(Need.product_id.in_(product_ids))
+            if exclude_product_ids:
+                query = query.filter(or_(Need.product_id.is_(None), Need.product_id.notin_(exclude_product_ids)))
+            return query.scalar()
 
     def get_customer_needs(self, customer_id):
-        return self.session.query(Need).filter_by(customer_id=customer_id).all()
+        with self.read_session() as session:
+            return session.query(Need).options(joinedload(Need.product)).filter_by(customer_id=customer_id).all()
 
     def search_customers(self, query):
-        return self.session.query(Customer).filter(
+        with self.read_session() as session:
+            return self._customer_search(session, query, Customer).all()
+
+    def search_customer_rows(self, query, limit=None):
+        # Same matches as search_customers as (id, name, phone) rows, which are
+        # cheap to keep in main.NeedsApp's search_cache.SearchCache
+        with self.read_session() as session:
+            search = self._customer_search(session, query, Customer.id, Customer.name, Customer.phone)
+            if limit:
+                search = search.limit(limit)
+            return search.all()
+
+    def _customer_search(self, session, query, *entities):
+        query = query.strip()
+        # Trigrams need at least three characters; shorter queries fall back to LIKE
+        if self.has_customer_search_index and len(query) >= 3:
+            match = '"' + query.replace('"', '""') + '"'
+            return session.query(*entities).join(
+                customers_fts, customers_fts.c.rowid == Customer.id
+            ).filter(
+                literal_column('customers_fts').op('MATCH')(match)
+            ).order_by(customers_fts.c.rank)
+        return session.query(*entities).filter(
             (Customer.name.ilike(f'%{query}%')) |
             (Customer.phone.ilike(f'%{query}%'))
-        ).all()
+        )
 
     def delete_customer(self, customer_id):
-        customer = self.session.query(Customer).get(customer_id)
-        if customer:
-            self.session.delete(customer)
-            self.session.commit()
-            return True
+        with self.session_scope() as session:
+            customer = session.get(Customer, customer_id)
+            if customer:
+                session.delete(customer)
+                return True
         return False
 
     def delete_product(self, product_id):
-        product = self.session.query(Product).get(product_id)
-        if product:
-            self.session.delete(product)
-            self.session.commit()
-            return True
-        return False
+        with self.session_scope() as session:
+            product = session.get(Product, product_id)
+            if not product:
+                return False
+            session.delete(product)
+        self.product_ids.discard(product_id)
+        return True
 
     def get_statistics(self):
-        total_customers = self.session.query(Customer).count()
-        total_products = self.session.query(Product).count()
-        total_needs = self.session.query(Need).count()
-        fulfilled_needs = self.session.query(Need).filter_by(is_fulfilled=True).count()
-        pending_needs = total_needs - fulfilled_needs
+        # Counters are maintained by triggers, see migrations._add_statistic_counters
+        with self.read_session() as session:
+            counters = dict(session.query(StatisticCounter.name, StatisticCounter.value).all())
+        total_needs = counters.get('total_needs', 0)
+        fulfilled_needs = counters.get('fulfilled_needs', 0)
         
         return {
-            'total_customers': total_customers,
-            'total_products': total_products,
+            'total_customers': counters.get('total_customers', 0),
+            'total_products': counters.get('total_products', 0),
             'total_needs': total_needs,
             'fulfilled_needs': fulfilled_needs,
-            'pending_needs': pending_needs
-        } 
\ No newline at end of file
+            'pending_needs': total_needs - fulfilled_needs
+        }
+
+    def get_data_version(self):
+        # Changes whenever needs or products change, see migrations._add_data_version
+        with self.read_session() as session:
+            return session.query(StatisticCounter.value).filter_by(name='data_version').scalar()
+
+    def check_statistics(self, repair=False):
+        # Compares the counters with full COUNT(*) queries and returns the
+        # mismatches as {name: (counter, actual)}; repair rebuilds them
+        with self.engine.begin() as conn:
+            actual = count_statistics(conn)
+            counters = dict(conn.execute(select(StatisticCounter.name, StatisticCounter.value)).all())
+            mismatches = {name: (counters.get(name), value)
+                          for name, value in actual.items() if counters.get(name) != value}
+            rollup_mismatches = self._check_daily_need_counts(conn)
+            if mismatches and repair:
+                rebuild_statistic_counters(conn)
+            if rollup_mismatches and repair:
+                rebuild_daily_need_counts(conn)
+            mismatches.update(rollup_mismatches)
+        return mismatches
\ No newline at end of file
@@ -0,0 +1,115 @@
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+from PyQt6.QtWidgets import QProgressBar, QPushButton
+
+class JobCancelled(Exception):
+    pass
+
+class JobSignals(QObject):
+    progress = pyqtSignal(int, object)
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+class Job(QRunnable):
+    # Runs fn(db, job) on a pool thread; every Database call opens its own
+    # session, so the GUI's Database can be shared with the worker. fn reports
+    # progress through job.report_progress, which also raises JobCancelled once
+    # cancel() has been called; results come back to the GUI thread as signals.
+    def __init__(self, db, fn, description=""):
+        super().__init__()
+        self.db = db
+        self.fn = fn
+        self.description = description
+        self.signals = JobSignals()
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def is_cancelled(self):
+        return self._cancelled
+
+    def report_progress(self, done, total=None):
+        if self._cancelled:
+            raise JobCancelled()
+        self.signals.progress.emit(done, total)
+
+    def run(self):
+        try:
+            # Only fn can abandon its work (via report_progress): once it has
+            # returned, its writes are committed and the result stands
+            result = self.fn(self.db, self)
+        except JobCancelled:
+            self.signals.cancelled.emit()
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+        else:
+            self.signals.finished.emit(result)
+
+class JobRunner(QObject):
+    # Starts jobs on the global thread pool and mirrors their progress in the
+    # main window's status bar, with a Cancel button while any job is running
+    def __init__(self, db, status_bar, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self.status_bar = status_bar
+        self.pool = QThreadPool.globalInstance()
+        self.active = []
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setMaximumWidth(200)
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.clicked.connect(self.cancel_all)
+        status_bar.addPermanentWidget(self.progress_bar)
+        status_bar.addPermanentWidget(self.cancel_button)
+        self.progress_bar.hide()
+        self.cancel_button.hide()
+
+    def start(self, fn, description="", on_finished=None, on_failed=None):
+        stats = self.db.query_stats
+        if stats is not None:
+            # Worker queries count towards the action that started the job
+            fn = self.tracked_job(fn, stats, f"{stats.current_action() or 'job'} / {description}")
+        job = Job(self.db, fn, description)
+        job.signals.progress.connect(lambda done, total: self.show_progress(job, done, total))
+        job.signals.finished.connect(lambda result: self.job_done(job, "Done", on_finished, result))
+        job.signals.failed.connect(lambda error: self.job_done(job, "Failed", on_failed, error))
+        job.signals.cancelled.connect(lambda: self.job_done(job, "Cancelled"))
+        self.active.append(job)
+        self.status_bar.showMessage(f"{description}...")
+        self.progress_bar.setRange(0, 0)
+        self.progress_bar.show()
+        self.cancel_button.show()
+        self.pool.start(job)
+        return job
+
+    @staticmethod
+    def tracked_job(fn, stats, name):
+        def run(db, job):
+            with stats.action(name):
+                return fn(db, job)
+        return run
+
+    def show_progress(self, job, done, total):
+        if total:
+            self.progress_bar.setRange(0, total)
+            self.progress_bar.setValue(min(done, total))
+            self.status_bar.showMessage(f"{job.description}: {done}/{total}")
+        else:
+            self.status_bar.showMessage(f"{job.description}: {done}")
+
+    def job_done(self, job, status, callback=None, value=None):
+        self.active.remove(job)
+        if not self.active:
+            self.progress_bar.hide()
+            self.cancel_button.hide()
+        self.status_bar.showMessage(f"{job.description}: {status}", 5000)
+        if callback:
+            callback(value)
+
+    def cancel_all(self):
+        for job in self.active:
+            job.cancel()
+
+    def wait(self, msecs=-1):
+        return self.pool.waitForDone(msecs)
@@ -1,23 +1,75 @@
+import time
+STARTED = time.perf_counter()
+
 import sys
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                             QHBoxLayout, QLabel, QLineEdit, QPushButton,
-                            QTableWidget, QTableWidgetItem, QMessageBox,
+                            QTableWidget, QTableWidgetItem, QTableView, QMessageBox,
                             QTabWidget, QFormLayout, QGroupBox, QGridLayout,
-                            QDialog, QFileDialog, QMenuBar, QMenu, QStatusBar)
-from PyQt6.QtCore import Qt
+                            QDialog, QFileDialog, QMenuBar, QMenu, QStatusBar, QPlainTextEdit,
+                            QInputDialog)
+from PyQt6.QtCore import Qt, QObject, QThreadPool, QTimer, pyqtSignal
 from PyQt6.QtGui import QAction, QIcon
-from database import Database, Product, Customer, Need
-from auth import AuthManager, User
-from data_manager import DataManager
+from database import Database, Customer
+from auth import AuthManager
+from data_manager import DataManager, EXPORT_DATASETS, export_format
 from calendar_view import CalendarView
-from charts import ChartsView
+from table_models import ProductsTableModel, CustomersTableModel, SearchResultsModel, ButtonDelegate
+from jobs import Job, JobRunner
+from sla_monitor import StaleNeedsMonitor
+from query_stats import tracked
+from config import load_sla_config
+from search_cache import SearchCache
 from datetime import datetime
 import os
 
+# Live customer search: the pause after the last keystroke before searching,
+# and the shortest query searched while typing (Search/Enter accept any).
+# Three characters keep typing on the trigram index instead of a LIKE scan.
+SEARCH_DELAY_MS = 250
+LIVE_SEARCH_MIN_LENGTH = 3
+# Most customers a search returns; longer results ask for a narrower query
+SEARCH_LIMIT = 500
+
+class StartupTrace:
+    # Milestones in ms since main.py started importing, printed to stderr when
+    # NEEDS_STARTUP_TRACE is set. Time spent in the login dialog is reported
+    # separately so time-to-first-window can be compared across databases.
+    def __init__(self, started):
+        self.started = started
+        self.enabled = bool(os.environ.get('NEEDS_STARTUP_TRACE'))
+        self.events = []
+        self.waiting = 0.0
+
+    def mark(self, label):
+        elapsed = (time.perf_counter() - self.started) * 1000
+        self.events.append((label, elapsed))
+        if self.enabled:
+            print(f"[startup] {elapsed:8.1f} ms  {label}", file=sys.stderr)
+        return elapsed
+
+    def wait(self, fn):
+        # Runs fn (e.g. the login dialog) without counting it as startup time
+        started = time.perf_counter()
+        try:
+            return fn()
+        finally:
+            self.waiting += (time.perf_counter() - started) * 1000
+
+    def finish(self, label):
+        elapsed = self.mark(label)
+        if self.enabled:
+            print(f"[startup] {elapsed - self.waiting:8.1f} ms  excluding {self.waiting:.1f} ms of user input",
+                  file=sys.stderr)
+
+startup_trace = StartupTrace(STARTED)
+startup_trace.mark("imports done")
+
 class LoginDialog(QDialog):
     def __init__(self, auth_manager):
         super().__init__()
         self.auth_manager = auth_manager
+        self.login_job = None
         self.setup_ui()
 
     def setup_ui(self):
@@ -31,38 +83,136 @@ class LoginDialog(QDialog):
         layout.addRow("Username:", self.username)
         layout.addRow("Password:", self.password)
         
-        login_button = QPushButton("Login")
-        login_button.clicked.connect(self.login)
-        layout.addRow(login_button)
+        self.login_button = QPushButton("Login")
+        self.login_button.clicked.connect(self.login)
+        layout.addRow(self.login_button)
 
     def login(self):
+        if self.login_job:
+            return
         username = self.username.text()
         password = self.password.text()
-        
-        user = self.auth_manager.authenticate(username, password)
+
+        # bcrypt is deliberately slow; verify on a pool thread so the dialog
+        # keeps repainting
+        self.login_button.setEnabled(False)
+        self.login_button.setText("Verifying...")
+        self.login_job = Job(self.auth_manager.db,
+                             lambda db, job: self.auth_manager.authenticate(username, password),
+                             "Login")
+        self.login_job.signals.finished.connect(self.login_finished)
+        self.login_job.signals.failed.connect(self.login_failed)
+        QThreadPool.globalInstance().start(self.login_job)
+
+    def login_finished(self, user):
+        self.login_job = None
+        self.login_button.setEnabled(True)
+        self.login_button.setText("Login")
         if user:
             self.accept()
         else:
             QMessageBox.warning(self, "Error", "Invalid username or password")
 
+    def login_failed(self, error):
+        self.login_job = None
+        self.login_button.setEnabled(True)
+        self.login_button.setText("Login")
+        QMessageBox.critical(self, "Error", f"Login failed: {error}")
+
+class QueryStatsDialog(QDialog):
+    # Developer view of query_stats.QueryStats: totals per action and the
+    # statements repeated within recent runs
+    def __init__(self, stats, parent=None):
+        super().__init__(parent)
+        self.stats = stats
+        self.setup_ui()
+        self.refresh()
+
+    def setup_ui(self):
+        self.setWindowTitle("Query Statistics")
+        self.resize(900, 600)
+        layout = QVBoxLayout(self)
+
+        self.actions_table = QTableWidget()
+        self.actions_table.setColumnCount(5)
+        self.actions_table.setHorizontalHeaderLabels(["Action", "Runs", "Queries", "Queries/Run", "Total ms"])
+        layout.addWidget(self.actions_table)
+
+        layout.addWidget(QLabel(f"Statements run {self.stats.repeat_threshold}+ times in one action:"))
+        self.repeated_text = QPlainTextEdit()
+        self.repeated_text.setReadOnly(True)
+        layout.addWidget(self.repeated_text)
+
+        buttons = QHBoxLayout()
+        for text, slot in [("Refresh", self.refresh), ("Reset", self.reset), ("Save JSON...", self.save)]:
+            button = QPushButton(text)
+            button.clicked.connect(slot)
+            buttons.addWidget(button)
+        layout.addLayout(buttons)
+
+    def refresh(self):
+        snapshot = self.stats.snapshot()
+        actions = sorted(snapshot['actions'].items(), key=lambda item: -item[1]['ms'])
+        self.actions_table.setRowCount(len(actions))
+        for i, (name, totals) in enumerate(actions):
+            per_run = totals['queries'] / totals['runs'] if totals['runs'] else totals['queries']
+            for column, value in enumerate([name, totals['runs'], totals['queries'],
+                                            f"{per_run:.1f}", f"{totals['ms']:.1f}"]):
+                self.actions_table.setItem(i, column, QTableWidgetItem(str(value)))
+        self.actions_table.resizeColumnsToContents()
+
+        lines = []
+        for run in reversed(snapshot['recent']):
+            for repeated in run['repeated']:
+                lines.append(f"{run['started']} {run['action']}: {repeated['count']}x {repeated['statement']}")
+        self.repeated_text.setPlainText("\n".join(lines) or "None")
+
+    def reset(self):
+        self.stats.reset()
+        self.refresh()
+
+    def save(self):
+        file_name, _ = QFileDialog.getSaveFileName(self, "Save Query Statistics", "", "JSON Files (*.json)")
+        if file_name:
+            self.stats.dump(file_name)
+
+class ChangeRelay(QObject):
+    # Re-emits the database's change_events.ChangeSet as a Qt signal; the
+    # queued connection delivers it on the GUI thread after the writing call
+    # (possibly on a job thread) has returned
+    changed = pyqtSignal(object)
+
+    def __init__(self, bus, parent=None):
+        super().__init__(parent)
+        self.bus = bus
+        self.publish = self.changed.emit
+        bus.subscribe(self.publish)
+
+    def close(self):
+        self.bus.unsubscribe(self.publish)
+
 class NeedsApp(QMainWindow):
     def __init__(self):
         super().__init__()
         self.db = Database()
-        self.auth_manager = AuthManager(self.db.session)
+        startup_trace.mark("database opened")
+        self.auth_manager = AuthManager(self.db)
         self.data_manager = DataManager(self.db)
         
         # Create admin user if not exists
         self.create_admin_user()
         
         # Show login dialog
-        if not self.show_login():
+        if not startup_trace.wait(self.show_login):
             sys.exit()
+        startup_trace.mark("logged in")
         
+        self.first_shown = False
         self.setup_ui()
+        startup_trace.mark("window built")
 
     def create_admin_user(self):
-        if not self.db.session.query(User).first():
+        if not self.auth_manager.has_users():
             try:
                 self.auth_manager.create_user("admin", "admin", True)
             except:
@@ -81,6 +231,21 @@ class NeedsApp(QMainWindow):
         
         # Create status bar
         self.statusBar().showMessage("Ready")
+        self.jobs = JobRunner(self.db, self.statusBar(), self)
+        self.setup_notifications()
+        self.setup_query_stats()
+        self.change_relay = ChangeRelay(self.db.changes, self)
+        self.change_relay.changed.connect(self.apply_changes, Qt.ConnectionType.QueuedConnection)
+        self.search_cache = SearchCache(self.db.search_customer_rows, SEARCH_LIMIT)
+        self.db.changes.subscribe(self.search_cache.apply_changes)
+        self.search_serial = 0
+        # Group commit: needs added within group_commit_ms of the first pending
+        # one are written together by commit_pending_entries
+        self.pending_entries = []
+        self.group_commit_timer = QTimer(self)
+        self.group_commit_timer.setSingleShot(True)
+        self.group_commit_timer.setInterval(self.db.group_commit_ms)
+        self.group_commit_timer.timeout.connect(self.commit_pending_entries)
         
         # Create main widget and layout
         main_widget = QWidget()
@@ -91,14 +256,79 @@ class NeedsApp(QMainWindow):
         self.tabs = QTabWidget()
         layout.addWidget(self.tabs)
         
-        # Add tabs
-        self.setup_dashboard_tab()
-        self.setup_add_customer_tab()
-        self.setup_search_tab()
-        self.setup_products_tab()
-        self.setup_customers_tab()
-        self.setup_calendar_tab()
-        self.setup_charts_tab()
+        # Add tabs; each one is only built (and queries the database) the first
+        # time it is shown, so startup does not depend on the database size
+        self.unbuilt_tabs = {}
+        self.recent_table = None
+        self.products_model = None
+        self.customers_model = None
+        self.calendar_view = None
+        self.charts_view = None
+        self.add_lazy_tab("Dashboard", self.setup_dashboard_tab)
+        self.add_lazy_tab("Add Customer Need", self.setup_add_customer_tab)
+        self.add_lazy_tab("Search", self.setup_search_tab)
+        self.add_lazy_tab("Products", self.setup_products_tab)
+        self.add_lazy_tab("Customers", self.setup_customers_tab)
+        self.add_lazy_tab("Calendar", self.setup_calendar_tab)
+        self.add_lazy_tab("Charts", self.setup_charts_tab)
+        self.tabs.currentChanged.connect(self.build_tab)
+        self.build_tab(self.tabs.currentIndex())
+
+    def add_lazy_tab(self, title, setup):
+        tab = QWidget()
+        self.tabs.addTab(tab, title)
+        self.unbuilt_tabs[tab] = setup
+
+    def build_tab(self, index):
+        tab = self.tabs.widget(index)
+        setup = self.unbuilt_tabs.pop(tab, None)
+        if setup is None:
+            return
+        started = time.perf_counter()
+        setup(tab)
+        startup_trace.mark(f"{self.tabs.tabText(index)} tab built in "
+                           f"{(time.perf_counter() - started) * 1000:.1f} ms")
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if not self.first_shown:
+            self.first_shown = True
+            # Fires once the first frame has been painted
+            QTimer.singleShot(0, lambda: startup_trace.finish("first window shown"))
+
+    def setup_notifications(self):
+        # Check for stale pending needs every 5 minutes
+        self.stale_needs_label = QLabel()
+        self.statusBar().addPermanentWidget(self.stale_needs_label)
+        self.stale_needs_monitor = StaleNeedsMonitor(
+            self.db, default_hours=load_sla_config()['default_hours'], parent=self)
+        self.stale_needs_monitor.stale_needs_changed.connect(self.show_stale_needs)
+        # The first (full) count waits until the window is up
+        QTimer.singleShot(0, self.stale_needs_monitor.start)
+
+    def setup_query_stats(self):
+        # Status bar readout of the last action's queries (NEEDS_DB_SQL_STATS=1)
+        if self.db.query_stats is None:
+            return
+        self.query_stats_label = QLabel()
+        self.statusBar().addPermanentWidget(self.query_stats_label)
+        self.query_stats_timer = QTimer(self)
+        self.query_stats_timer.timeout.connect(self.show_query_stats)
+        self.query_stats_timer.start(1000)
+
+    def show_query_stats(self):
+        run = self.db.query_stats.last_run()
+        if run is not None:
+            self.query_stats_label.setText(self.db.query_stats.summary(run))
+
+    def show_query_stats_dialog(self):
+        QueryStatsDialog(self.db.query_stats, self).exec()
+
+    def show_stale_needs(self, total, newly_stale):
+        self.stale_needs_label.setText(f"Stale needs: {total}")
+        self.stale_needs_label.setStyleSheet("color: red;" if total else "")
+        if newly_stale:
+            self.statusBar().showMessage(f"{newly_stale} more needs have passed their pending time limit", 10000)
 
     def create_menu_bar(self):
         menubar = self.menuBar()
@@ -113,6 +343,13 @@ class NeedsApp(QMainWindow):
         import_action = QAction("Import Data", self)
         import_action.triggered.connect(self.import_data)
         file_menu.addAction(import_action)
+
+        # Views follow this window's own changes; Refresh picks up changes
+        # made elsewhere, e.g. by "python -m needs import"
+        refresh_action = QAction("Refresh", self)
+        refresh_action.setShortcut("F5")
+        refresh_action.triggered.connect(self.update_all_tabs)
+        file_menu.addAction(refresh_action)
         
         # Tools menu
         tools_menu = menubar.addMenu("Tools")
@@ -120,6 +357,11 @@ class NeedsApp(QMainWindow):
         settings_action = QAction("Settings", self)
         settings_action.triggered.connect(self.show_settings)
         tools_menu.addAction(settings_action)
+
+        if self.db.query_stats is not None:
+            query_stats_action = QAction("Query Statistics", self)
+            query_stats_action.triggered.connect(self.show_query_stats_dialog)
+            tools_menu.addAction(query_stats_action)
         
         # Help menu
         help_menu = menubar.addMenu("Help")
@@ -128,10 +370,7 @@ class NeedsApp(QMainWindow):
         about_action.triggered.connect(self.show_about)
         help_menu.addAction(about_action)
 
-    def setup_dashboard_tab(self):
-        dashboard_tab = QWidget()
-        self.tabs.addTab(dashboard_tab, "Dashboard")
-        
+    def setup_dashboard_tab(self, dashboard_tab):
         layout = QVBoxLayout(dashboard_tab)
         
         # Statistics Group
@@ -167,10 +406,7 @@ class NeedsApp(QMainWindow):
         
         self.update_dashboard()
 
-    def setup_add_customer_tab(self):
-        add_customer_tab = QWidget()
-        self.tabs.addTab(add_customer_tab, "Add Customer Need")
-        
+    def setup_add_customer_tab(self, add_customer_tab):
         customer_form = QFormLayout()
         self.customer_name = QLineEdit()
         self.customer_phone = QLineEdit()
@@ -186,10 +422,7 @@ class NeedsApp(QMainWindow):
         
         add_customer_tab.setLayout(customer_form)
 
-    def setup_search_tab(self):
-        search_tab = QWidget()
-        self.tabs.addTab(search_tab, "Search")
-        
+    def setup_search_tab(self, search_tab):
         search_layout = QVBoxLayout()
         
         # Search by Product
@@ -208,8 +441,15 @@ class NeedsApp(QMainWindow):
         customer_group = QGroupBox("Search by Customer")
         customer_layout = QVBoxLayout()
         self.search_customer = QLineEdit()
+        self.search_customer.setPlaceholderText("Results update as you type")
         customer_search_button = QPushButton("Search")
         customer_search_button.clicked.connect(self.search_customer_needs)
+        self.search_customer.returnPressed.connect(self.search_customer_needs)
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DELAY_MS)
+        self.search_timer.timeout.connect(self.live_search_customers)
+        self.search_customer.textChanged.connect(lambda: self.search_timer.start())
         
         customer_layout.addWidget(QLabel("Customer Name/Phone:"))
         customer_layout.addWidget(self.search_customer)
@@ -217,9 +457,13 @@ class NeedsApp(QMainWindow):
         customer_group.setLayout(customer_layout)
         
         # Results Table
-        self.results_table = QTableWidget()
-        self.results_table.setColumnCount(4)
-        self.results_table.setHorizontalHeaderLabels(["Customer Name", "Phone", "Product", "Fulfill"])
+        self.results_model = SearchResultsModel(self)
+        self.results_table = QTableView()
+        self.results_table.setModel(self.results_model)
+        results_delegate = ButtonDelegate(self.results_table)
+        results_delegate.clicked.connect(
+            lambda row: self.mark_fulfilled(self.results_model.row_id(row), self.results_model.product_name))
+        self.results_table.setItemDelegateForColumn(self.results_model.action_column(), results_delegate)
         
         search_layout.addWidget(product_group)
         search_layout.addWidget(customer_group)
@@ -227,10 +471,7 @@ class NeedsApp(QMainWindow):
         
         search_tab.setLayout(search_layout)
 
-    def setup_products_tab(self):
-        products_tab = QWidget()
-        self.tabs.addTab(products_tab, "Products")
-        
+    def setup_products_tab(self, products_tab):
         layout = QVBoxLayout()
         
         # Add Product
@@ -244,9 +485,13 @@ class NeedsApp(QMainWindow):
         add_product_layout.addWidget(add_product_button)
         
         # Products Table
-        self.products_table = QTableWidget()
-        self.products_table.setColumnCount(2)
-        self.products_table.setHorizontalHeaderLabels(["Product Name", "Delete"])
+        self.products_model = ProductsTableModel(self.db, self)
+        self.products_table = QTableView()
+        self.products_table.setModel(self.products_model)
+        products_delegate = ButtonDelegate(self.products_table)
+        products_delegate.clicked.connect(
+            lambda row: self.delete_product(self.products_model.row_id(row)))
+        self.products_table.setItemDelegateForColumn(self.products_model.action_column(), products_delegate)
         
         layout.addLayout(add_product_layout)
         layout.addWidget(self.products_table)
@@ -254,60 +499,89 @@ class NeedsApp(QMainWindow):
         products_tab.setLayout(layout)
         self.update_products_table()
 
-    def setup_customers_tab(self):
-        customers_tab = QWidget()
-        self.tabs.addTab(customers_tab, "Customers")
-        
+    def setup_customers_tab(self, customers_tab):
         layout = QVBoxLayout()
         
         # Customers Table
-        self.customers_table = QTableWidget()
-        self.customers_table.setColumnCount(4)
-        self.customers_table.setHorizontalHeaderLabels(["Name", "Phone", "Needs", "Delete"])
+        self.customers_model = CustomersTableModel(self.db, self)
+        self.customers_table = QTableView()
+        self.customers_table.setModel(self.customers_model)
+        customers_delegate = ButtonDelegate(self.customers_table)
+        customers_delegate.clicked.connect(
+            lambda row: self.delete_customer(self.customers_model.row_id(row)))
+        self.customers_table.setItemDelegateForColumn(self.customers_model.action_column(), customers_delegate)
         
         layout.addWidget(self.customers_table)
         
         customers_tab.setLayout(layout)
         self.update_customers_table()
 
-    def setup_calendar_tab(self):
-        calendar_tab = CalendarView(self.db)
-        self.tabs.addTab(calendar_tab, "Calendar")
-
-    def setup_charts_tab(self):
-        charts_tab = ChartsView(self.db)
-        self.tabs.addTab(charts_tab, "Charts")
-
+    def setup_calendar_tab(self, calendar_tab):
+        self.calendar_view = CalendarView(self.db)
+        layout = QVBoxLayout(calendar_tab)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.calendar_view)
+
+    def setup_charts_tab(self, charts_tab):
+        # matplotlib is only imported once the Charts tab is opened
+        from charts import ChartsView
+        self.charts_view = ChartsView(self.db)
+        layout = QVBoxLayout(charts_tab)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.charts_view)
+
+    @tracked
     def export_data(self):
-        file_name, _ = QFileDialog.getSaveFileName(
-            self, "Export Data", "", "CSV Files (*.csv)")
-        
-        if file_name:
-            try:
-                if "customers" in file_name.lower():
-                    self.data_manager.export_customers_to_csv(file_name)
-                elif "products" in file_name.lower():
-                    self.data_manager.export_products_to_csv(file_name)
-                else:
-                    self.data_manager.export_needs_to_csv(file_name)
-                QMessageBox.information(self, "Success", "Data exported successfully")
-            except Exception as e:
-                QMessageBox.warning(self, "Error", f"Failed to export data: {str(e)}")
+        file_name, selected_filter = QFileDialog.getSaveFileName(
+            self, "Export Data", "",
+            "CSV Files (*.csv);;Excel Workbooks (*.xlsx);;Parquet Files (*.parquet);;Feather Files (*.feather)")
+        if not file_name:
+            return
+        if not os.path.splitext(file_name)[1]:
+            # "(*.xlsx)" -> ".xlsx"
+            file_name += selected_filter[selected_filter.rindex('*') + 1:-1]
+        try:
+            export_format(file_name)
+        except ValueError as e:
+            QMessageBox.warning(self, "Error", str(e))
+            return
 
+        dataset, ok = QInputDialog.getItem(
+            self, "Export Data", "Data to export:", [name.capitalize() for name in EXPORT_DATASETS], 0, False)
+        if not ok:
+            return
+        dataset = dataset.lower()
+        self.jobs.start(
+            lambda db, job: DataManager(db).export_data(dataset, file_name, progress=job.report_progress),
+            "Exporting data",
+            on_finished=lambda result: QMessageBox.information(self, "Success", "Data exported successfully"),
+            on_failed=lambda error: QMessageBox.warning(self, "Error", f"Failed to export data: {error}"))
+
+    @tracked
     def import_data(self):
         file_name, _ = QFileDialog.getOpenFileName(
             self, "Import Data", "", "CSV Files (*.csv)")
         
         if file_name:
-            try:
-                if "customers" in file_name.lower():
-                    self.data_manager.import_customers_from_csv(file_name)
-                elif "products" in file_name.lower():
-                    self.data_manager.import_products_from_csv(file_name)
-                QMessageBox.information(self, "Success", "Data imported successfully")
-                self.update_all_tabs()
-            except Exception as e:
-                QMessageBox.warning(self, "Error", f"Failed to import data: {str(e)}")
+            if "customers" in file_name.lower():
+                load = DataManager.import_customers_from_csv
+            elif "products" in file_name.lower():
+                load = DataManager.import_products_from_csv
+            else:
+                QMessageBox.warning(self, "Error", "File name must contain 'customers' or 'products'")
+                return
+            self.jobs.start(
+                lambda db, job: load(DataManager(db), file_name, progress=job.report_progress),
+                "Importing data",
+                on_finished=self.import_finished,
+                on_failed=lambda error: QMessageBox.warning(self, "Error", f"Failed to import data: {error}"))
+
+    def import_finished(self, report):
+        message = (f"Imported {report['imported']} rows, rejected {report['rejected']} "
+                   f"({report['rows_per_second']:.0f} rows/s)")
+        if report['rejected_file']:
+            message += f"\nRejected rows were written to {report['rejected_file']}"
+        QMessageBox.information(self, "Success", message)
 
     def show_settings(self):
         # Implement settings dialog
@@ -319,33 +593,100 @@ class NeedsApp(QMainWindow):
                          "Version 1.0\n"
                          "A comprehensive system for managing customer needs and product tracking.")
 
+    @tracked
     def update_all_tabs(self):
+        # Also picks up products added or deleted by other processes
+        self.db.product_ids.invalidate()
         self.update_dashboard()
         self.update_products_table()
         self.update_customers_table()
-        self.tabs.widget(5).update_data()  # Update charts
-        self.tabs.widget(4).update_calendar_highlights()  # Update calendar
-
+        # Chart and calendar data are loaded off the GUI thread, then rendered
+        # here; views that were never opened load fresh data when first shown
+        charts_view = self.charts_view
+        calendar_view = self.calendar_view
+        if charts_view is None and calendar_view is None:
+            return
+        top_n = charts_view.top_n if charts_view else None
+        year, month = calendar_view.visible_month() if calendar_view else (None, None)
+
+        def load_highlights(db):
+            # The version is read first: a write in between must leave the
+            # cached month older than the data, never newer
+            version = db.get_data_version()
+            return year, month, calendar_view.load_highlight_counts(db, year, month), version
+
+        self.jobs.start(
+            lambda db, job: (charts_view and charts_view.load_chart_data(db, top_n),
+                             calendar_view and load_highlights(db)),
+            "Refreshing views",
+            on_finished=self.refresh_finished,
+            on_failed=lambda error: self.statusBar().showMessage(f"Refresh failed: {error}", 5000))
+
+    def refresh_finished(self, result):
+        chart_data, highlights = result
+        if chart_data:
+            self.charts_view.render_charts(chart_data)
+        if highlights:
+            self.calendar_view.apply_highlights(*highlights)
+
+    @tracked
+    def apply_changes(self, changes):
+        # Patches every built view for one committed change set
+        self.patch_dashboard(changes)
+        for view in (self.products_model, self.customers_model, self.calendar_view, self.charts_view):
+            if view is not None:
+                view.apply_changes(changes)
+
+    def patch_dashboard(self, changes):
+        if self.recent_table is None:
+            return
+        deltas = changes.statistic_deltas()
+        if deltas is None:
+            self.update_dashboard()
+            return
+        for name, delta in deltas.items():
+            self.dashboard_stats[name] += delta
+        self.show_statistics()
+        if changes.needs or changes.deleted['customers'] or changes.deleted['products']:
+            self.update_recent_activity()
+
+    def closeEvent(self, event):
+        self.commit_pending_entries()
+        self.change_relay.close()
+        self.db.changes.unsubscribe(self.search_cache.apply_changes)
+        self.jobs.cancel_all()
+        self.jobs.wait()
+        super().closeEvent(event)
+
+    @tracked
     def update_dashboard(self):
-        stats = self.db.get_statistics()
+        if self.recent_table is None:
+            return
+        self.dashboard_stats = self.db.get_statistics()
+        self.show_statistics()
+        self.update_recent_activity()
+
+    def show_statistics(self):
+        stats = self.dashboard_stats
         self.total_customers_label.setText(f"Total Customers: {stats['total_customers']}")
         self.total_products_label.setText(f"Total Products: {stats['total_products']}")
         self.total_needs_label.setText(f"Total Needs: {stats['total_needs']}")
         self.fulfilled_needs_label.setText(f"Fulfilled Needs: {stats['fulfilled_needs']}")
         self.pending_needs_label.setText(f"Pending Needs: {stats['pending_needs']}")
-        
-        # Update recent activity
-        recent_needs = self.db.session.query(Need).order_by(Need.created_at.desc()).limit(10).all()
+
+    def update_recent_activity(self):
+        recent_needs = self.db.get_recent_activity(10)
         self.recent_table.setRowCount(len(recent_needs))
         
-        for i, need in enumerate(recent_needs):
-            self.recent_table.setItem(i, 0, QTableWidgetItem(need.customer.name))
-            self.recent_table.setItem(i, 1, QTableWidgetItem(need.product.name))
-            status = "Fulfilled" if need.is_fulfilled else "Pending"
+        for i, (customer_name, product_name, is_fulfilled, created_at, fulfilled_at) in enumerate(recent_needs):
+            self.recent_table.setItem(i, 0, QTableWidgetItem(customer_name))
+            self.recent_table.setItem(i, 1, QTableWidgetItem(product_name))
+            status = "Fulfilled" if is_fulfilled else "Pending"
             self.recent_table.setItem(i, 2, QTableWidgetItem(status))
-            date = need.fulfilled_at if need.is_fulfilled else need.created_at
+            date = fulfilled_at if is_fulfilled else created_at
             self.recent_table.setItem(i, 3, QTableWidgetItem(date.strftime("%Y-%m-%d %H:%M")))
 
+    @tracked
     def add_customer_need(self):
         try:
             name = self.customer_name.text()
@@ -356,99 +697,128 @@ class NeedsApp(QMainWindow):
                 QMessageBox.warning(self, "Error", "Please fill in all fields")
                 return
             
-            # Add customer
-            customer = self.db.add_customer(name, phone)
-            
-            # Add product if it doesn't exist
-            product_obj = self.db.session.query(Product).filter_by(name=product).first()
-            if not product_obj:
-                product_obj = self.db.add_product(product)
-            
-            # Add need
-            self.db.add_need(customer.id, product_obj.id)
-            
-            QMessageBox.information(self, "Success", "Customer need added successfully")
+            if self.db.group_commit_ms:
+                if not self.db.validate_phone(phone):
+                    raise ValueError("Invalid phone number format")
+                self.pending_entries.append((name, phone, product))
+                if not self.group_commit_timer.isActive():
+                    self.group_commit_timer.start()
+                self.statusBar().showMessage(f"{len(self.pending_entries)} need(s) waiting to be saved")
+            else:
+                # Customer, product if missing and need in one commit
+                self.db.add_customer_need(name, phone, product)
+                QMessageBox.information(self, "Success", "Customer need added successfully")
             self.customer_name.clear()
             self.customer_phone.clear()
             self.product_name.clear()
-            self.update_products_table()
-            self.update_customers_table()
-            self.update_dashboard()
             
         except ValueError as e:
             QMessageBox.warning(self, "Error", str(e))
 
+    @tracked
+    def commit_pending_entries(self):
+        # One transaction for the whole window; if it fails, each entry is
+        # retried alone so a single bad entry does not lose the others
+        self.group_commit_timer.stop()
+        entries, self.pending_entries = self.pending_entries, []
+        if not entries:
+            return
+        saved = len(entries)
+        try:
+            self.db.add_customer_needs(entries)
+        except Exception:
+            failed = []
+            for name, phone, product in entries:
+                try:
+                    self.db.add_customer_need(name, phone, product)
+                except Exception as e:
+                    failed.append(f"{name} ({phone}), {product}: {e}")
+            saved -= len(failed)
+            if failed:
+                QMessageBox.warning(self, "Error", "Could not save:\n" + "\n".join(failed))
+        self.statusBar().showMessage(f"Saved {saved} need(s)", 5000)
+
+    @tracked
     def search_product_needs(self):
         product_name = self.search_product.text()
         if not product_name:
             QMessageBox.warning(self, "Error", "Please enter a product name")
             return
         
+        # Results of customer searches still running are dropped
+        self.search_serial += 1
         customers = self.db.get_customers_needing_product(product_name)
         self.update_results_table(customers, product_name)
 
+    @tracked
     def search_customer_needs(self):
+        self.search_timer.stop()
         query = self.search_customer.text()
-        if not query:
+        if not query.strip():
             QMessageBox.warning(self, "Error", "Please enter a search query")
             return
-        
-        customers = self.db.search_customers(query)
-        self.update_results_table(customers)
+        self.start_customer_search(query)
 
-    def update_results_table(self, customers, product_name=None):
-        self.results_table.setRowCount(len(customers))
-        
-        for i, customer in enumerate(customers):
-            self.results_table.setItem(i, 0, QTableWidgetItem(customer.name))
-            self.results_table.setItem(i, 1, QTableWidgetItem(customer.phone))
-            
-            if product_name:
-                self.results_table.setItem(i, 2, QTableWidgetItem(product_name))
-                fulfill_button = QPushButton("Mark as Fulfilled")
-                fulfill_button.clicked.connect(lambda checked, c=customer: self.mark_fulfilled(c.id, product_name))
-                self.results_table.setCellWidget(i, 3, fulfill_button)
-            else:
-                needs = self.db.get_customer_needs(customer.id)
-                needs_text = ", ".join([need.product.name for need in needs if not need.is_fulfilled])
-                self.results_table.setItem(i, 2, QTableWidgetItem(needs_text))
-                self.results_table.setItem(i, 3, QTableWidgetItem(""))
+    def live_search_customers(self):
+        query = self.search_customer.text()
+        if len(query.strip()) >= LIVE_SEARCH_MIN_LENGTH:
+            self.start_customer_search(query)
+
+    def start_customer_search(self, query):
+        # Matches come from the search cache, pending needs from the database;
+        # only the newest search updates the results table
+        self.search_serial += 1
+        serial = self.search_serial
+        cache = self.search_cache
+
+        def search(db, job):
+            customers, truncated = cache.lookup(query)
+            return customers, truncated, db.get_needs_for_customers([customer.id for customer in customers])
+
+        self.jobs.start(search, "Searching customers",
+                        on_finished=lambda result: self.customer_search_finished(serial, *result))
 
+    def customer_search_finished(self, serial, customers, truncated, pending_needs):
+        if serial != self.search_serial:
+            return
+        self.update_results_table(customers, pending_needs=pending_needs)
+        if truncated:
+            self.statusBar().showMessage(
+                f"Showing the first {len(customers)} matches; type more to narrow the search", 5000)
+
+    def update_results_table(self, customers, product_name=None, pending_needs=None):
+        if product_name:
+            rows = [(customer.id, customer.name, customer.phone, product_name) for customer in customers]
+        else:
+            if pending_needs is None:
+                pending_needs = self.db.get_needs_for_customers([customer.id for customer in customers])
+            rows = [(customer.id, customer.name, customer.phone,
+                     ", ".join([name for name, _ in pending_needs.get(customer.id, [])]))
+                    for customer in customers]
+        self.results_model.set_results(rows, product_name)
+
+    @tracked
     def mark_fulfilled(self, customer_id, product_name):
-        product = self.db.session.query(Product).filter_by(name=product_name).first()
-        if product:
-            if self.db.mark_need_fulfilled(customer_id, product.id):
-                QMessageBox.information(self, "Success", "Need marked as fulfilled")
-                self.search_product_needs()
-                self.update_dashboard()
-            else:
-                QMessageBox.warning(self, "Error", "Could not mark need as fulfilled")
+        product_id = self.db.resolve_product(product_name)
+        if product_id is None:
+            QMessageBox.warning(self, "Error", f"Product '{product_name}' not found")
+        elif self.db.mark_need_fulfilled(customer_id, product_id):
+            QMessageBox.information(self, "Success", "Need marked as fulfilled")
+            self.search_product_needs()
+        else:
+            QMessageBox.warning(self, "Error", "Could not mark need as fulfilled")
 
+    @tracked
     def update_products_table(self):
-        products = self.db.get_all_products()
-        self.products_table.setRowCount(len(products))
-        for i, product in enumerate(products):
-            self.products_table.setItem(i, 0, QTableWidgetItem(product.name))
-            
-            delete_button = QPushButton("Delete")
-            delete_button.clicked.connect(lambda checked, p=product: self.delete_product(p.id))
-            self.products_table.setCellWidget(i, 1, delete_button)
+        if self.products_model is not None:
+            self.products_model.refresh()
 
+    @tracked
     def update_customers_table(self):
-        customers = self.db.get_all_customers()
-        self.customers_table.setRowCount(len(customers))
-        for i, customer in enumerate(customers):
-            self.customers_table.setItem(i, 0, QTableWidgetItem(customer.name))
-            self.customers_table.setItem(i, 1, QTableWidgetItem(customer.phone))
-            
-            needs = self.db.get_customer_needs(customer.id)
-            needs_text = ", ".join([need.product.name for need in needs if not need.is_fulfilled])
-            self.customers_table.setItem(i, 2, QTableWidgetItem(needs_text))
-            
-            delete_button = QPushButton("Delete")
-            delete_button.clicked.connect(lambda checked, c=customer: self.delete_customer(c.id))
-            self.customers_table.setCellWidget(i, 3, delete_button)
+        if self.customers_model is not None:
+            self.customers_model.refresh()
 
+    @tracked
     def add_product(self):
         product_name = self.new_product.text()
         if not product_name:
@@ -458,12 +828,11 @@ class NeedsApp(QMainWindow):
         try:
             self.db.add_product(product_name)
             self.new_product.clear()
-            self.update_products_table()
-            self.update_dashboard()
             QMessageBox.information(self, "Success", "Product added successfully")
         except Exception as e:
             QMessageBox.warning(self, "Error", str(e))
 
+    @tracked
     def delete_product(self, product_id):
         reply = QMessageBox.question(self, 'Confirm Delete',
                                    'Are you sure you want to delete this product?',
@@ -471,12 +840,11 @@ class NeedsApp(QMainWindow):
         
         if reply == QMessageBox.StandardButton.Yes:
             if self.db.delete_product(product_id):
-                self.update_products_table()
-                self.update_dashboard()
                 QMessageBox.information(self, "Success", "Product deleted successfully")
             else:
                 QMessageBox.warning(self, "Error", "Could not delete product")
 
+    @tracked
     def delete_customer(self, customer_id):
         reply = QMessageBox.question(self, 'Confirm Delete',
                                    'Are you sure you want to delete this customer?',
@@ -484,8 +852,6 @@ class NeedsApp(QMainWindow):
         
         if reply == QMessageBox.StandardButton.Yes:
             if self.db.delete_customer(customer_id):
-                self.update_customers_table()
-                self.update_dashboard()
                 QMessageBox.information(self, "Success", "Customer deleted successfully")
             else:
                 QMessageBox.warning(self, "Error", "Could not delete customer")
@@ -0,0 +1,154 @@
+from sqlalchemy import text, inspect
+from sqlalchemy.exc import OperationalError
+
+# Versioned schema upgrades for existing databases. The applied version is kept
+# in SQLite's PRAGMA user_version. Every migration must be idempotent (IF NOT
+# EXISTS), because SQLite DDL may be committed before the version is bumped.
+
+def _add_performance_indexes(conn):
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_needs_product_fulfilled ON needs (product_id, is_fulfilled)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_needs_customer_fulfilled ON needs (customer_id, is_fulfilled)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_needs_created_at ON needs (created_at)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_customers_phone ON customers (phone)"))
+    conn.execute(text("ANALYZE"))
+
+def _add_customer_search_index(conn):
+    # Trigram FTS5 needs SQLite 3.34+; older builds keep the LIKE fallback
+    try:
+        conn.execute(text(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS customers_fts USING fts5("
+            "name, phone, content='customers', content_rowid='id', tokenize='trigram')"))
+    except OperationalError:
+        return
+    conn.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS customers_fts_insert AFTER INSERT ON customers BEGIN "
+        "INSERT INTO customers_fts(rowid, name, phone) VALUES (new.id, new.name, new.phone); END"))
+    conn.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS customers_fts_delete AFTER DELETE ON customers BEGIN "
+        "INSERT INTO customers_fts(customers_fts, rowid, name, phone) "
+        "VALUES ('delete', old.id, old.name, old.phone); END"))
+    conn.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS customers_fts_update AFTER UPDATE ON customers BEGIN "
+        "INSERT INTO customers_fts(customers_fts, rowid, name, phone) "
+        "VALUES ('delete', old.id, old.name, old.phone); "
+        "INSERT INTO customers_fts(rowid, name, phone) VALUES (new.id, new.name, new.phone); END"))
+    conn.execute(text("INSERT INTO customers_fts(customers_fts) VALUES ('rebuild')"))
+
+STATISTIC_COUNTERS = {
+    'total_customers': "SELECT COUNT(*) FROM customers",
+    'total_products': "SELECT COUNT(*) FROM products",
+    'total_needs': "SELECT COUNT(*) FROM needs",
+    'fulfilled_needs': "SELECT COUNT(*) FROM needs WHERE is_fulfilled = 1",
+}
+
+def count_statistics(conn):
+    return {name: conn.execute(text(sql)).scalar() for name, sql in STATISTIC_COUNTERS.items()}
+
+def rebuild_statistic_counters(conn):
+    for name, value in count_statistics(conn).items():
+        conn.execute(text("INSERT OR REPLACE INTO statistics (name, value) VALUES (:name, :value)"),
+                     {'name': name, 'value': value})
+
+def _counter_trigger(name, event, table, updates):
+    statements = " ".join(
+        f"UPDATE statistics SET value = value + ({delta}) WHERE name = '{counter}';"
+        for counter, delta in updates)
+    return text(f"CREATE TRIGGER IF NOT EXISTS {name} AFTER {event} ON {table} BEGIN {statements} END")
+
+def _add_statistic_counters(conn):
+    # Triggers run inside the writing transaction, so the counters can never
+    # drift from the committed rows, even for bulk inserts that bypass the ORM
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS statistics (name VARCHAR NOT NULL PRIMARY KEY, value INTEGER NOT NULL)"))
+    conn.execute(_counter_trigger('statistics_customers_insert', 'INSERT', 'customers',
+                                  [('total_customers', '1')]))
+    conn.execute(_counter_trigger('statistics_customers_delete', 'DELETE', 'customers',
+                                  [('total_customers', '-1')]))
+    conn.execute(_counter_trigger('statistics_products_insert', 'INSERT', 'products',
+                                  [('total_products', '1')]))
+    conn.execute(_counter_trigger('statistics_products_delete', 'DELETE', 'products',
+                                  [('total_products', '-1')]))
+    conn.execute(_counter_trigger('statistics_needs_insert', 'INSERT', 'needs',
+                                  [('total_needs', '1'), ('fulfilled_needs', 'new.is_fulfilled IS 1')]))
+    conn.execute(_counter_trigger('statistics_needs_delete', 'DELETE', 'needs',
+                                  [('total_needs', '-1'), ('fulfilled_needs', '-(old.is_fulfilled IS 1)')]))
+    conn.execute(_counter_trigger('statistics_needs_update', 'UPDATE OF is_fulfilled', 'needs',
+                                  [('fulfilled_needs', '(new.is_fulfilled IS 1) - (old.is_fulfilled IS 1)')]))
+    rebuild_statistic_counters(conn)
+
+def rebuild_daily_need_counts(conn):
+    conn.execute(text("DELETE FROM need_daily_counts"))
+    conn.execute(text(
+        "INSERT INTO need_daily_counts (day, total, fulfilled) "
+        "SELECT date(created_at), COUNT(*), SUM(is_fulfilled IS 1) FROM needs "
+        "WHERE created_at IS NOT NULL GROUP BY date(created_at)"))
+
+def _daily_upsert(row, sign):
+    return (f"INSERT INTO need_daily_counts (day, total, fulfilled) "
+            f"VALUES (date({row}.created_at), {sign}1, {sign}({row}.is_fulfilled IS 1)) "
+            f"ON CONFLICT(day) DO UPDATE SET total = total + excluded.total, "
+            f"fulfilled = fulfilled + excluded.fulfilled;")
+
+def _add_daily_need_counts(conn):
+    # Per-day rollup of needs so charts and the calendar never scan the needs table
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS need_daily_counts (day VARCHAR NOT NULL PRIMARY KEY, "
+        "total INTEGER NOT NULL, fulfilled INTEGER NOT NULL)"))
+    conn.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS need_daily_counts_insert AFTER INSERT ON needs "
+        f"WHEN new.created_at IS NOT NULL BEGIN {_daily_upsert('new', '')} END"))
+    conn.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS need_daily_counts_delete AFTER DELETE ON needs "
+        f"WHEN old.created_at IS NOT NULL BEGIN {_daily_upsert('old', '-')} END"))
+    conn.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS need_daily_counts_update_old AFTER UPDATE OF is_fulfilled, created_at ON needs "
+        f"WHEN old.created_at IS NOT NULL BEGIN {_daily_upsert('old', '-')} END"))
+    conn.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS need_daily_counts_update_new AFTER UPDATE OF is_fulfilled, created_at ON needs "
+        f"WHEN new.created_at IS NOT NULL BEGIN {_daily_upsert('new', '')} END"))
+    rebuild_daily_need_counts(conn)
+
+def _add_data_version(conn):
+    # Bumped by every change to needs or products, so views can skip refreshes
+    # when nothing they show has changed since they last rendered
+    conn.execute(text("INSERT OR IGNORE INTO statistics (name, value) VALUES ('data_version', 0)"))
+    for table in ('needs', 'products'):
+        for event in ('INSERT', 'UPDATE', 'DELETE'):
+            conn.execute(_counter_trigger(f'data_version_{table}_{event.lower()}', event, table,
+                                          [('data_version', '1')]))
+
+def _add_need_sla_support(conn):
+    # Partial index over pending needs only, for the stale-needs monitor
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_needs_pending_created_at ON needs (created_at) WHERE is_fulfilled = 0"))
+    columns = [row[1] for row in conn.execute(text("PRAGMA table_info(products)"))]
+    if 'sla_hours' not in columns:
+        conn.execute(text("ALTER TABLE products ADD COLUMN sla_hours INTEGER"))
+
+MIGRATIONS = [
+    (1, "Add indexes for needs lookups and customer phones", _add_performance_indexes),
+    (2, "Add trigram full-text index for customer search", _add_customer_search_index),
+    (3, "Add trigger-maintained statistics counters", _add_statistic_counters),
+    (4, "Add per-day need counts rollup", _add_daily_need_counts),
+    (5, "Add data version stamp for needs and products", _add_data_version),
+    (6, "Add per-product SLA hours and pending needs index", _add_need_sla_support),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+def get_schema_version(conn):
+    return conn.execute(text("PRAGMA user_version")).scalar()
+
+def run_migrations(engine):
+    applied = []
+    for version, description, migrate in MIGRATIONS:
+        with engine.begin() as conn:
+            if get_schema_version(conn) >= version:
+                continue
+            migrate(conn)
+            conn.execute(text(f"PRAGMA user_version = {version}"))
+        applied.append((version, description))
+    return applied
+
+def has_table(engine, name):
+    return inspect(engine).has_table(name)
@@ -0,0 +1,133 @@
+import argparse
+import json
+import os
+import sqlite3
+import sys
+from pathlib import Path
+from config import load_config
+
+# Command line entry point for batch jobs; needs neither Qt, matplotlib nor a
+# login. Heavy modules are imported by the command that uses them, so
+# "stats" and --help start in milliseconds.
+#
+#   python -m needs stats --json
+#   python -m needs export needs nightly.parquet
+#   python -m needs import customers customers.csv
+
+# Schema version that added the trigger-maintained statistics table
+STATISTICS_SCHEMA_VERSION = 3
+
+def read_statistics(path):
+    # Reads the statistics counters with the stdlib sqlite3 module, without
+    # loading SQLAlchemy; None when the database is missing or not migrated yet
+    try:
+        conn = sqlite3.connect(f"{Path(path).resolve().as_uri()}?mode=ro", uri=True)
+    except sqlite3.OperationalError:
+        return None
+    try:
+        if conn.execute("PRAGMA user_version").fetchone()[0] < STATISTICS_SCHEMA_VERSION:
+            return None
+        counters = dict(conn.execute("SELECT name, value FROM statistics"))
+    except sqlite3.DatabaseError:
+        return None
+    finally:
+        conn.close()
+    total_needs = counters.get('total_needs', 0)
+    fulfilled_needs = counters.get('fulfilled_needs', 0)
+    return {
+        'total_customers': counters.get('total_customers', 0),
+        'total_products': counters.get('total_products', 0),
+        'total_needs': total_needs,
+        'fulfilled_needs': fulfilled_needs,
+        'pending_needs': total_needs - fulfilled_needs
+    }
+
+def check_database(path):
+    # Database() would create an empty database at a mistyped path, and batch
+    # jobs would then report zeros or export nothing instead of failing
+    if not os.path.isfile(path):
+        raise FileNotFoundError(f"database not found: {path}")
+
+def open_database():
+    from database import Database
+    return Database()
+
+def show_progress(done, total):
+    if total:
+        print(f"\r{done}/{total}", end='', file=sys.stderr, flush=True)
+    else:
+        print(f"\r{done}", end='', file=sys.stderr, flush=True)
+
+def stats_command(args):
+    stats = read_statistics(load_config()['path'])
+    if stats is None:
+        stats = open_database().get_statistics()
+    if args.json:
+        print(json.dumps(stats))
+    else:
+        for name, value in stats.items():
+            print(f"{name.replace('_', ' ').capitalize()}: {value}")
+
+def export_command(args):
+    from data_manager import DataManager
+    manager = DataManager(open_database())
+    manager.export_data(args.dataset, args.file, None if args.quiet else show_progress, args.format)
+    if not args.quiet:
+        print(file=sys.stderr)
+    print(f"Exported {args.dataset} to {args.file}")
+
+def import_command(args):
+    from data_manager import DataManager
+    manager = DataManager(open_database())
+    load = {'customers': manager.import_customers_from_csv,
+            'products': manager.import_products_from_csv}[args.dataset]
+    report = load(args.file, None if args.quiet else show_progress)
+    if not args.quiet:
+        print(file=sys.stderr)
+    if args.json:
+        print(json.dumps(report))
+    else:
+        print(f"Imported {report['imported']} rows, rejected {report['rejected']} "
+              f"({report['rows_per_second']:.0f} rows/s)")
+        if report['rejected_file']:
+            print(f"Rejected rows were written to {report['rejected_file']}")
+
+def build_parser():
+    # Mirrors data_manager.EXPORT_DATASETS and EXPORT_FORMATS, which are not
+    # imported here to keep --help fast
+    parser = argparse.ArgumentParser(prog='python -m needs', description="Needs Management System command line")
+    parser.add_argument('--db', help="database file (default: the configured path, see config.py)")
+    parser.add_argument('--quiet', '-q', action='store_true', help="no progress output")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    stats = commands.add_parser('stats', help="print customer, product and need counts")
+    stats.add_argument('--json', action='store_true')
+    stats.set_defaults(run=stats_command)
+
+    export = commands.add_parser('export', help="export a dataset; the format follows the file extension")
+    export.add_argument('dataset', choices=['needs', 'customers', 'products'])
+    export.add_argument('file', help=".csv, .xlsx, .parquet or .feather")
+    export.add_argument('--format', choices=['csv', 'xlsx', 'parquet', 'feather'])
+    export.set_defaults(run=export_command)
+
+    load = commands.add_parser('import', help="import customers or products from CSV")
+    load.add_argument('dataset', choices=['customers', 'products'])
+    load.add_argument('file')
+    load.add_argument('--json', action='store_true')
+    load.set_defaults(run=import_command)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.db:
+        os.environ['NEEDS_DB_PATH'] = args.db
+    try:
+        check_database(load_config()['path'])
+        args.run(args)
+    except (ValueError, RuntimeError, OSError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
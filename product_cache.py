@@ -0,0 +1,46 @@
+import threading
+
+class ProductCache:
+    # Product name -> id for the whole (small) products table, so the add-need
+    # and fulfil paths resolve names without a query. Database updates it after
+    # each commit that adds or deletes a product; bulk imports mark it stale
+    # and it is reloaded on the next lookup. load() returns (id, name) pairs.
+    def __init__(self, load):
+        self.load = load
+        self.ids = {}
+        self.names = {}
+        self.stale = True
+        self.generation = 0
+        self.lock = threading.Lock()
+
+    def reload(self):
+        # A failed load leaves the cache stale; so does an invalidate() that
+        # arrives while the rows are being read
+        with self.lock:
+            generation = self.generation
+        rows = self.load()
+        with self.lock:
+            self.ids = {name: product_id for product_id, name in rows}
+            self.names = {product_id: name for product_id, name in rows}
+            self.stale = generation != self.generation
+
+    def get(self, name):
+        if self.stale:
+            self.reload()
+        return self.ids.get(name)
+
+    def add(self, name, product_id):
+        with self.lock:
+            self.ids[name] = product_id
+            self.names[product_id] = name
+
+    def discard(self, product_id):
+        with self.lock:
+            name = self.names.pop(product_id, None)
+            if name is not None:
+                self.ids.pop(name, None)
+
+    def invalidate(self):
+        with self.lock:
+            self.generation += 1
+            self.stale = True
@@ -0,0 +1,162 @@
+import functools
+import inspect
+import json
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from sqlalchemy import event
+
+UNATTRIBUTED = '(no action)'
+
+def statement_shape(statement):
+    # Bound parameters already hide the values; collapse parameter lists and
+    # whitespace so "IN (?)" and "IN (?, ?, ?)" count as the same statement
+    statement = re.sub(r'\(\s*\?(?:\s*,\s*\?)*\s*\)', '(?, ...)', statement)
+    return ' '.join(statement.split())
+
+class ActionRun:
+    def __init__(self, name):
+        self.name = name
+        self.started = datetime.now()
+        self.queries = 0
+        self.seconds = 0.0
+        # {shape: [count, seconds]}
+        self.statements = {}
+
+    def record(self, statement, seconds):
+        self.queries += 1
+        self.seconds += seconds
+        entry = self.statements.setdefault(statement_shape(statement), [0, 0.0])
+        entry[0] += 1
+        entry[1] += seconds
+
+    def repeated(self, threshold):
+        # Shapes executed threshold times or more within this run: likely N+1
+        return sorted(((shape, count) for shape, (count, _) in self.statements.items() if count >= threshold),
+                      key=lambda item: -item[1])
+
+class QueryStats:
+    # Attributes every statement executed on an engine, with its time, to the
+    # UI action running on the same thread (see action() and tracked()).
+    # Per-action totals accumulate over the session; the last runs are kept
+    # individually so repeated statement shapes can be reported per click.
+    def __init__(self, engine, repeat_threshold=5, history=200):
+        self.engine = engine
+        self.repeat_threshold = repeat_threshold
+        self.recent = deque(maxlen=history)
+        self.totals = {}
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        event.listen(engine, 'before_cursor_execute', self.before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', self.after_cursor_execute)
+
+    def before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+    def after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        seconds = time.perf_counter() - conn.info['query_started'].pop()
+        run = self.current_run()
+        if run is not None:
+            run.record(statement, seconds)
+        else:
+            with self.lock:
+                self._add_totals(UNATTRIBUTED, 0, 1, seconds, {statement_shape(statement): [1, seconds]})
+
+    def current_run(self):
+        return getattr(self.local, 'run', None)
+
+    def current_action(self):
+        run = self.current_run()
+        return run.name if run else None
+
+    @contextmanager
+    def action(self, name):
+        # Nested actions on the same thread are folded into the outer one
+        if self.current_run() is not None:
+            yield self.current_run()
+            return
+        run = ActionRun(name)
+        self.local.run = run
+        try:
+            yield run
+        finally:
+            self.local.run = None
+            with self.lock:
+                self.recent.append(run)
+                self._add_totals(name, 1, run.queries, run.seconds, run.statements)
+
+    def _add_totals(self, name, runs, queries, seconds, statements):
+        totals = self.totals.setdefault(name, {'runs': 0, 'queries': 0, 'seconds': 0.0, 'statements': {}})
+        totals['runs'] += runs
+        totals['queries'] += queries
+        totals['seconds'] += seconds
+        for shape, (count, shape_seconds) in statements.items():
+            entry = totals['statements'].setdefault(shape, [0, 0.0])
+            entry[0] += count
+            entry[1] += shape_seconds
+
+    def last_run(self):
+        with self.lock:
+            return self.recent[-1] if self.recent else None
+
+    def summary(self, run):
+        text = f"{run.name}: {run.queries} queries, {run.seconds * 1000:.1f} ms"
+        repeated = run.repeated(self.repeat_threshold)
+        if repeated:
+            text += f", {len(repeated)} repeated (N+1?)"
+        return text
+
+    def snapshot(self):
+        with self.lock:
+            actions = {
+                name: {
+                    'runs': totals['runs'],
+                    'queries': totals['queries'],
+                    'ms': totals['seconds'] * 1000,
+                    'statements': [{'statement': shape, 'count': count, 'ms': seconds * 1000}
+                                   for shape, (count, seconds) in sorted(
+                                       totals['statements'].items(), key=lambda item: -item[1][1])],
+                }
+                for name, totals in self.totals.items()
+            }
+            recent = [{
+                'action': run.name,
+                'started': run.started.isoformat(timespec='milliseconds'),
+                'queries': run.queries,
+                'ms': run.seconds * 1000,
+                'repeated': [{'statement': shape, 'count': count}
+                             for shape, count in run.repeated(self.repeat_threshold)],
+            } for run in self.recent]
+        return {'repeat_threshold': self.repeat_threshold, 'actions': actions, 'recent': recent}
+
+    def dump(self, filename):
+        with open(filename, 'w') as f:
+            json.dump(self.snapshot(), f, indent=2)
+
+    def reset(self):
+        with self.lock:
+            self.totals = {}
+            self.recent.clear()
+
+def tracked(fn):
+    # Runs a method of an object with a .db as one named action when the
+    # database has query statistics enabled. Qt passes extra signal arguments
+    # (e.g. "checked") to slots, so surplus positional arguments are dropped.
+    accepts_varargs = any(parameter.kind == parameter.VAR_POSITIONAL
+                          for parameter in inspect.signature(fn).parameters.values())
+    max_args = len(inspect.signature(fn).parameters) - 1
+
+    @functools.wraps(fn)
+    def wrapper(self, *args, **kwargs):
+        if not accepts_varargs:
+            args = args[:max_args]
+        stats = self.db.query_stats
+        if stats is None:
+            return fn(self, *args, **kwargs)
+        with stats.action(f"{type(self).__name__}.{fn.__name__}"):
+            return fn(self, *args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,65 @@
+import threading
+from collections import OrderedDict
+
+class SearchCache:
+    # LRU of customer search results keyed by the normalised query. Matching is
+    # a case-insensitive substring test on name or phone, so a query containing
+    # a cached one ("amina" after "ami") is answered by filtering the cached
+    # rows in memory, keeping their order, instead of querying SQLite again.
+    # Searches return at most limit rows; truncated results are cached but
+    # never narrowed, since the rows they miss may match the longer query.
+    # lookup() runs on worker threads; clear() runs when customers change.
+    def __init__(self, search, limit, size=32):
+        self.search = search
+        self.limit = limit
+        self.size = size
+        self.entries = OrderedDict()
+        self.generation = 0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def normalise(query):
+        return query.strip().casefold()
+
+    @staticmethod
+    def matches(row, query):
+        return query in row.name.casefold() or query in (row.phone or '').casefold()
+
+    def lookup(self, query):
+        # Returns (rows, truncated)
+        key = self.normalise(query)
+        with self.lock:
+            generation = self.generation
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                return entry
+            narrower = max((cached for cached, (_, truncated) in self.entries.items()
+                            if cached and cached in key and not truncated), key=len, default=None)
+            cached_rows = self.entries[narrower][0] if narrower is not None else None
+
+        if cached_rows is not None:
+            entry = tuple(row for row in cached_rows if self.matches(row, key)), False
+        else:
+            # One extra row tells a full result from a truncated one
+            rows = tuple(self.search(key, self.limit + 1))
+            entry = rows[:self.limit], len(rows) > self.limit
+
+        with self.lock:
+            # Results read before a clear() may predate the change; not kept
+            if generation == self.generation:
+                self.entries[key] = entry
+                self.entries.move_to_end(key)
+                while len(self.entries) > self.size:
+                    self.entries.popitem(last=False)
+        return entry
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.generation += 1
+
+    def apply_changes(self, changes):
+        # change_events.ChangeBus subscriber; needs are not part of the results
+        if changes.touches('customers'):
+            self.clear()
@@ -0,0 +1,67 @@
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+from datetime import datetime, timedelta
+
+class StaleNeedsMonitor(QObject):
+    # Tracks pending needs older than their product's SLA (Product.sla_hours,
+    # falling back to default_hours). The full indexed COUNT only runs at start
+    # and after the data changed; otherwise each tick counts just the needs that
+    # crossed their threshold since the previous tick (the high-water mark).
+    stale_needs_changed = pyqtSignal(int, int)  # total stale, newly stale
+
+    def __init__(self, db, default_hours=24, interval_ms=300000, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self.default_hours = default_hours
+        self.total = None
+        self.version = None
+        self.thresholds = None
+        self.cutoffs = {}
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.check)
+        self.interval_ms = interval_ms
+
+    def start(self):
+        self.check()
+        self.timer.start(self.interval_ms)
+
+    def stop(self):
+        self.timer.stop()
+
+    def threshold_groups(self, thresholds):
+        # [(hours, product_ids, exclude_product_ids)]: one group per explicit
+        # SLA plus the default group for every other product
+        groups = [(hours, product_ids, None) for hours, product_ids in thresholds.items()]
+        explicit = [product_id for product_ids in thresholds.values() for product_id in product_ids]
+        groups.append((self.default_hours, None, explicit))
+        return groups
+
+    def check(self, now=None):
+        now = now or datetime.now()
+        version = self.db.get_data_version()
+        thresholds = self.db.get_sla_thresholds()
+        if thresholds != self.thresholds:
+            self.cutoffs = {}
+        recount = self.total is None or version != self.version or thresholds != self.thresholds
+
+        total = 0
+        newly_stale = 0
+        cutoffs = {}
+        for index, (hours, product_ids, exclude_product_ids) in enumerate(self.threshold_groups(thresholds)):
+            cutoff = now - timedelta(hours=hours)
+            previous = self.cutoffs.get(index)
+            if previous is not None:
+                newly_stale += self.db.count_stale_needs(cutoff, previous, product_ids, exclude_product_ids)
+            if recount:
+                total += self.db.count_stale_needs(cutoff, None, product_ids, exclude_product_ids)
+            cutoffs[index] = cutoff
+        if not recount:
+            total = self.total + newly_stale
+
+        changed = total != self.total or newly_stale
+        self.total = total
+        self.version = version
+        self.thresholds = thresholds
+        self.cutoffs = cutoffs
+        if changed:
+            self.stale_needs_changed.emit(total, newly_stale)
+        return total, newly_stale
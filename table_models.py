@@ -0,0 +1,262 @@
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex, QEvent, pyqtSignal
+from PyQt6.QtWidgets import QStyledItemDelegate, QStyleOptionButton, QStyle, QApplication
+from query_stats import tracked
+
+class LazyTableModel(QAbstractTableModel):
+    # Rows are fetched in batches as the view scrolls, so the cost of a
+    # refresh depends on the visible rows and not on the table size.
+    headers = []
+    action_text = None
+    batch_size = 200
+    # Table whose change_events drive apply_changes
+    table = None
+
+    def __init__(self, db, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self.rows = []
+        self.exhausted = False
+
+    def fetch_rows(self, after_id, limit):
+        # Return a list of tuples whose first element is the row id
+        raise NotImplementedError
+
+    def fetch_rows_by_ids(self, ids):
+        raise NotImplementedError
+
+    def affected_ids(self, changes):
+        # Ids whose displayed values may have changed
+        return changes.updated[self.table]
+
+    def apply_changes(self, changes):
+        # Patches the loaded rows for a change_events.ChangeSet: deleted rows
+        # are removed, changed ones re-read, and new rows appended once the
+        # table is fully loaded (otherwise fetchMore will reach them)
+        if self.table in changes.reset:
+            self.refresh()
+            return
+
+        deleted = changes.deleted[self.table]
+        for row in reversed(range(len(self.rows))):
+            if self.rows[row][0] in deleted:
+                self.beginRemoveRows(QModelIndex(), row, row)
+                del self.rows[row]
+                self.endRemoveRows()
+
+        positions = {row[0]: i for i, row in enumerate(self.rows)}
+        changed = [row_id for row_id in self.affected_ids(changes) if row_id in positions]
+        if changed:
+            fresh = {row[0]: row for row in self.fetch_rows_by_ids(changed)}
+            for row_id in changed:
+                row = positions[row_id]
+                if row_id in fresh:
+                    self.rows[row] = fresh[row_id]
+                    self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.headers) - 1))
+
+        last_id = self.rows[-1][0] if self.rows else 0
+        inserted = sorted(row_id for row_id in changes.inserted[self.table] if row_id > last_id)
+        if inserted and self.exhausted:
+            batch = self.fetch_rows_by_ids(inserted)
+            if batch:
+                start = len(self.rows)
+                self.beginInsertRows(QModelIndex(), start, start + len(batch) - 1)
+                self.rows.extend(batch)
+                self.endInsertRows()
+
+    def refresh(self):
+        self.beginResetModel()
+        self.rows = []
+        self.exhausted = False
+        self.endResetModel()
+
+    def row_id(self, row):
+        return self.rows[row][0]
+
+    def action_column(self):
+        return len(self.headers) - 1 if self.action_text else None
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.headers[section]
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if index.column() == self.action_column():
+            return self.action_text
+        return self.rows[index.row()][index.column() + 1]
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self.exhausted
+
+    @tracked
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        after_id = self.rows[-1][0] if self.rows else 0
+        batch = self.fetch_rows(after_id, self.batch_size)
+        if len(batch) < self.batch_size:
+            self.exhausted = True
+        if not batch:
+            return
+        start = len(self.rows)
+        self.beginInsertRows(QModelIndex(), start, start + len(batch) - 1)
+        self.rows.extend(batch)
+        self.endInsertRows()
+
+class ProductsTableModel(LazyTableModel):
+    headers = ["Product Name", "SLA (hours)", "Delete"]
+    action_text = "Delete"
+    table = 'products'
+    sla_column = 1
+
+    def fetch_rows(self, after_id, limit):
+        return self.product_rows(self.db.get_products_page(after_id, limit))
+
+    def fetch_rows_by_ids(self, ids):
+        return self.product_rows(self.db.get_products_by_ids(ids))
+
+    def product_rows(self, products):
+        # An empty SLA cell means the configured default applies
+        return [(product.id, product.name, '' if product.sla_hours is None else product.sla_hours)
+                for product in products]
+
+    def flags(self, index):
+        flags = super().flags(index)
+        if index.column() == self.sla_column:
+            flags |= Qt.ItemFlag.ItemIsEditable
+        return flags
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.EditRole:
+            role = Qt.ItemDataRole.DisplayRole
+        return super().data(index, role)
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        # The row is re-read when the change bus reports the update
+        if role != Qt.ItemDataRole.EditRole or index.column() != self.sla_column:
+            return False
+        value = str(value).strip()
+        try:
+            return self.db.set_product_sla(self.row_id(index.row()), int(value) if value else None)
+        except ValueError:
+            return False
+
+class CustomersTableModel(LazyTableModel):
+    headers = ["Name", "Phone", "Needs", "Delete"]
+    action_text = "Delete"
+    table = 'customers'
+
+    def fetch_rows(self, after_id, limit):
+        return self.customer_rows(self.db.get_customers_with_needs(after_id, limit))
+
+    def fetch_rows_by_ids(self, ids):
+        return self.customer_rows(self.db.get_customers_by_ids(ids))
+
+    def customer_rows(self, customers):
+        rows = []
+        for customer, needs in customers:
+            needs_text = ", ".join([name for name, _ in needs])
+            rows.append((customer.id, customer.name, customer.phone, needs_text))
+        return rows
+
+    def affected_ids(self, changes):
+        # The Needs column lists pending product names
+        return changes.updated[self.table] | {need.customer_id for need in changes.needs}
+
+    def apply_changes(self, changes):
+        # Renamed or deleted products show up in any customer's Needs column
+        if changes.updated['products'] or changes.deleted['products'] or 'needs' in changes.reset:
+            self.refresh()
+        else:
+            super().apply_changes(changes)
+
+class SearchResultsModel(QAbstractTableModel):
+    # Results of the Search tab: held in memory, but handed to the view in
+    # batches so a large result costs no more to show than its first screen.
+    # Rows are (customer_id, name, phone, product text); product searches get
+    # a "Mark as Fulfilled" button per row.
+    headers = ["Customer Name", "Phone", "Product", "Fulfill"]
+    action_text = "Mark as Fulfilled"
+    batch_size = 200
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.results = []
+        self.shown = 0
+        self.product_name = None
+
+    def set_results(self, rows, product_name=None):
+        self.beginResetModel()
+        self.results = rows
+        self.shown = 0
+        self.product_name = product_name
+        self.endResetModel()
+
+    def row_id(self, row):
+        return self.results[row][0]
+
+    def action_column(self):
+        return len(self.headers) - 1
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.shown
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.headers[section]
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if index.column() == self.action_column():
+            return self.action_text if self.product_name else None
+        return self.results[index.row()][index.column() + 1]
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self.shown < len(self.results)
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        count = min(self.batch_size, len(self.results) - self.shown)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self.shown, self.shown + count - 1)
+        self.shown += count
+        self.endInsertRows()
+
+class ButtonDelegate(QStyledItemDelegate):
+    # Paints a push button in the cell instead of creating a real widget per row
+    clicked = pyqtSignal(int)
+
+    def paint(self, painter, option, index):
+        # Cells without text get no button
+        if not index.data():
+            super().paint(painter, option, index)
+            return
+        button = QStyleOptionButton()
+        button.rect = option.rect.adjusted(2, 2, -2, -2)
+        button.text = index.data()
+        button.state = QStyle.StateFlag.State_Enabled | QStyle.StateFlag.State_Raised
+        style = option.widget.style() if option.widget else QApplication.style()
+        style.drawControl(QStyle.ControlElement.CE_PushButton, button, painter, option.widget)
+
+    def editorEvent(self, event, model, option, index):
+        if (index.data() and event.type() == QEvent.Type.MouseButtonRelease
+                and event.button() == Qt.MouseButton.LeftButton
+                and option.rect.contains(event.position().toPoint())):
+            self.clicked.emit(index.row())
+            return True
+        return False
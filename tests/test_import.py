@@ -0,0 +1,59 @@
+import pytest
+from config import DEFAULTS, ENGINE_PROFILES
+from data_manager import DataManager
+from database import Database
+
+def legacy_database(path):
+    # Rollback journal with a tiny page cache, so the import transaction
+    # spills to the database file (taking its exclusive lock) early on
+    config = dict(DEFAULTS)
+    config.update(path=str(path), pragmas=dict(ENGINE_PROFILES['legacy'], cache_size=10, busy_timeout=100))
+    return Database(config=config)
+
+def write_customers(path, count):
+    with open(path, 'w') as f:
+        f.write('Name,Phone\n')
+        for i in range(count):
+            f.write(f'Customer {i},+2126{i:08d}\n')
+
+def test_import_checks_existing_rows_on_its_own_connection(tmp_path):
+    db = legacy_database(tmp_path / 'needs.db')
+    manager = DataManager(db)
+    manager.chunk_size = 1000
+    filename = tmp_path / 'customers.csv'
+    write_customers(filename, 20000)
+    try:
+        assert manager.import_customers_from_csv(str(filename))['imported'] == 20000
+        report = manager.import_customers_from_csv(str(filename))
+        assert (report['imported'], report['rejected']) == (0, 20000)
+        assert db.check_statistics() == {}
+    finally:
+        db.engine.dispose()
+
+def test_rejection_report_is_kept_only_when_the_import_commits(tmp_path):
+    db = legacy_database(tmp_path / 'needs.db')
+    manager = DataManager(db)
+    manager.chunk_size = 100
+    filename = tmp_path / 'customers.csv'
+    with open(filename, 'w') as f:
+        f.write('Name,Phone\n')
+        for i in range(1000):
+            f.write(f'Customer {i},{"invalid" if i % 10 == 0 else f"+2126{i:08d}"}\n')
+    rejected_file = tmp_path / 'customers_rejected.csv'
+
+    def cancel(done, total):
+        if done >= 500:
+            raise RuntimeError("cancelled")
+
+    try:
+        with pytest.raises(RuntimeError):
+            manager.import_customers_from_csv(str(filename), progress=cancel)
+        assert db.get_statistics()['total_customers'] == 0
+        assert list(tmp_path.glob('customers_rejected*')) == []
+
+        report = manager.import_customers_from_csv(str(filename))
+        assert (report['imported'], report['rejected']) == (900, 100)
+        assert report['rejected_file'] == str(rejected_file)
+        assert list(tmp_path.glob('customers_rejected*')) == [rejected_file]
+    finally:
+        db.engine.dispose()
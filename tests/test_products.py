@@ -0,0 +1,30 @@
+import pytest
+import database
+from config import DEFAULTS, ENGINE_PROFILES
+from database import Database
+
+@pytest.fixture(params=[True, False], ids=['returning', 'insert-then-select'])
+def db(request, tmp_path, monkeypatch):
+    # Both get-or-create paths run on any SQLite that has upsert
+    monkeypatch.setattr(database, 'SQLITE_HAS_RETURNING', request.param)
+    config = dict(DEFAULTS)
+    config.update(path=str(tmp_path / 'needs.db'), pragmas=ENGINE_PROFILES[DEFAULTS['profile']])
+    db = Database(config=config)
+    yield db
+    db.engine.dispose()
+
+def test_get_or_create_product(db):
+    published = []
+    db.changes.subscribe(published.append)
+    product_id = db.get_or_create_product('Milk')
+    assert published[-1].inserted['products'] == {product_id}
+
+    # A name another writer inserted behind the cache's back
+    db.product_ids.discard(product_id)
+    assert db.get_or_create_product('Milk') == product_id
+    assert len(published) == 1
+
+    db.add_customer_needs([('Amina', '+212600000001', 'Tea'), ('Omar', '+212600000002', 'Tea')])
+    assert db.resolve_product('Tea') is not None
+    assert db.get_statistics()['total_products'] == 2
+    assert db.check_statistics() == {}
@@ -0,0 +1,135 @@
+import shutil
+import sqlite3
+from collections import Counter
+from pathlib import Path
+import pytest
+from config import DEFAULTS, ENGINE_PROFILES
+from database import Database, Customer
+from migrations import MIGRATIONS
+
+BASELINE = Path(__file__).resolve().parent.parent / 'needs.db'
+
+def open_database(path):
+    config = dict(DEFAULTS)
+    config.update(path=str(path), pragmas=ENGINE_PROFILES[DEFAULTS['profile']])
+    return Database(config=config)
+
+@pytest.fixture
+def db(tmp_path):
+    db = open_database(tmp_path / 'needs.db')
+    yield db
+    db.engine.dispose()
+
+class DeltaTracker:
+    # Applies every published ChangeSet's deltas to the last known statistics
+    # and per-day counts; bulk changes (no deltas) re-read them instead
+    def __init__(self, db):
+        self.db = db
+        self.reload()
+        db.changes.subscribe(self.apply)
+
+    def reload(self):
+        self.stats = self.db.get_statistics()
+        self.days = self.day_counts()
+
+    def day_counts(self):
+        return Counter({day: (total, pending) for day, total, pending in self.db.get_need_counts_by_day()})
+
+    def apply(self, changes):
+        deltas = changes.statistic_deltas()
+        if deltas is None:
+            self.reload()
+            return
+        for name, delta in deltas.items():
+            self.stats[name] += delta
+        for day, (total, pending) in changes.day_deltas().items():
+            day = day.strftime('%Y-%m-%d')
+            day_total, day_pending = self.days.get(day, (0, 0))
+            self.days[day] = (day_total + total, day_pending + pending)
+            if self.days[day] == (0, 0):
+                del self.days[day]
+
+def check(db, tracker):
+    assert db.check_statistics() == {}
+    assert tracker.stats == db.get_statistics()
+    assert tracker.days == tracker.day_counts()
+
+def test_counters_and_deltas_follow_every_mutation(db):
+    tracker = DeltaTracker(db)
+    check(db, tracker)
+
+    customer = db.add_customer('Amina Tazi', '+212600000001')
+    check(db, tracker)
+    product = db.add_product('Milk')
+    check(db, tracker)
+    db.add_need(customer.id, product.id)
+    db.add_need(customer.id, product.id)
+    check(db, tracker)
+
+    assert db.mark_need_fulfilled(customer.id, product.id)
+    check(db, tracker)
+
+    bread = db.get_or_create_product('Bread')
+    assert db.get_or_create_product('Bread') == bread
+    check(db, tracker)
+    db.add_customer_need('Youssef', '+212600000002', 'Bread')
+    db.add_customer_needs([('Sara', '+212600000003', 'Tea'), ('Omar', '+212600000004', 'Milk')])
+    check(db, tracker)
+
+    with pytest.raises(ValueError):
+        db.add_customer_needs([('Nadia', '+212600000005', 'Sugar'), ('Bad', 'invalid', 'Sugar')])
+    check(db, tracker)
+
+    db.bulk_add_customers([[{'name': f'Bulk {i}', 'phone': f'+2126100000{i:02d}'} for i in range(10)]])
+    check(db, tracker)
+    db.bulk_add_products([[{'name': 'Milk'}, {'name': 'Coffee'}]])
+    check(db, tracker)
+
+    assert db.delete_customer(customer.id)
+    check(db, tracker)
+    assert db.delete_product(product.id)
+    check(db, tracker)
+
+    stats = db.get_statistics()
+    assert stats['total_customers'] == 13
+    assert stats['total_products'] == 3
+    assert (stats['total_needs'], stats['fulfilled_needs'], stats['pending_needs']) == (5, 1, 4)
+
+def test_rolled_back_writes_publish_nothing(db):
+    published = []
+    db.changes.subscribe(published.append)
+    with pytest.raises(RuntimeError):
+        with db.session_scope() as session:
+            session.add(Customer(name='Amina Tazi', phone='+212600000001'))
+            session.flush()
+            raise RuntimeError("abort")
+    assert published == []
+    assert db.get_statistics()['total_customers'] == 0
+    assert db.check_statistics() == {}
+
+def test_baseline_database_upgrades_to_current_schema(tmp_path):
+    path = tmp_path / 'needs.db'
+    shutil.copyfile(BASELINE, path)
+    with sqlite3.connect(path) as conn:
+        assert conn.execute('PRAGMA user_version').fetchone()[0] == 0
+        before = [conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+                  for table in ('customers', 'products', 'needs')]
+
+    db = open_database(path)
+    try:
+        with db.engine.connect() as conn:
+            assert conn.exec_driver_sql('PRAGMA user_version').scalar() == MIGRATIONS[-1][0] == 6
+        assert db.check_statistics() == {}
+        stats = db.get_statistics()
+        assert [stats['total_customers'], stats['total_products'], stats['total_needs']] == before
+        assert len(db.search_customer_rows(db.get_all_customers()[0].name)) >= 1
+    finally:
+        db.engine.dispose()
+
+    # Running the migrations again is a no-op
+    db = open_database(path)
+    try:
+        assert db.check_statistics() == {}
+        assert db.get_statistics() == stats
+    finally:
+        db.engine.dispose()